@@ -1,7 +1,9 @@
 import logging
 from typing import List, Dict, Any, Optional
 from llm.litellm_provider import LiteLLMProvider
-from prompts.chat_prompt import chat_prompt
+from prompts.chat_prompt import render as render_chat_prompt
+
+logger = logging.getLogger(__name__)
 
 class ChatAgent:
     """
@@ -45,43 +47,26 @@ class ChatAgent:
             history_context = "\n".join(history_parts)
         # Document selection context
         doc_context = "all available documents" if 'all' in selected_documents else "selected documents"
-        # Use chat_prompt to construct messages
-        prompt_inputs = {
-            "doc_context": doc_context,
-            "context": context,
-            "history_context": history_context,
-            "user_message": user_message
-        }
-        # Convert LangChain BaseMessage objects to OpenAI API message dicts
-        lc_messages = chat_prompt.format_messages(**prompt_inputs)
-        messages = []
-        for msg in lc_messages:
-            # Map LangChain message types to OpenAI roles
-            if hasattr(msg, 'type'):
-                if msg.type == 'system':
-                    role = 'system'
-                elif msg.type == 'human':
-                    role = 'user'
-                elif msg.type == 'ai':
-                    role = 'assistant'
-                elif msg.type == 'tool':
-                    role = 'tool'
-                else:
-                    role = msg.type
-            else:
-                role = 'user'
-            messages.append({"role": role, "content": msg.content})
+        # Render chat_prompt directly to OpenAI API message dicts
+        messages = render_chat_prompt(
+            doc_context=doc_context,
+            context=context,
+            history_context=history_context,
+            user_message=user_message
+        )
         # Generate response
         try:
-            logging.info(f"Generating response with model: {self.llm_provider.model}")
-            logging.info(f"Messages: {messages}")
+            logger.info("Generating response with model: %s", self.llm_provider.model)
+            logger.info("Using context: %.100s...", context)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Messages: %s", messages)
             answer = self.llm_provider.chat(
                 messages=messages,
                 temperature=0.7
             )
             return {'success': True, 'response': answer, 'sources': list(sources)}
         except Exception as e:
-            logging.error(f"Error generating chat response: {e}")
+            logger.error("Error generating chat response: %s", e)
             return {'success': False, 'error': str(e)}
 
     def get_conversation_starters(self, selected_documents: List[str]) -> List[str]:
@@ -113,5 +98,5 @@ class ChatAgent:
                     ])
             return starters[:5]
         except Exception as e:
-            logging.error(f"Error getting conversation starters: {e}")
+            logger.error("Error getting conversation starters: %s", e)
             return ["What can you tell me about these documents?"] 
\ No newline at end of file
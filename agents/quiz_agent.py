@@ -1,23 +1,144 @@
+import asyncio
 import json
+from collections import deque
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
 import logging
+import random
 from llm.litellm_provider import LiteLLMProvider
-from prompts.quiz_prompt import quiz_prompt
+from prompts.quiz_prompt import QUIZ_SYSTEM_PROMPT, QUIZ_USER_PROMPT
+from services.semantic_cache import SemanticCache
 import string
-from langchain.output_parsers import StructuredOutputParser, ResponseSchema
 from json_repair import repair_json
 
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup; fall back to stdlib json
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on LLM requests in flight when generating questions concurrently
+MAX_CONCURRENT_GENERATIONS = 8
+# Answered questions kept for adaptive difficulty
+QUESTION_HISTORY_SIZE = 20
+# Questions generated per batched call when generate_question's queue runs dry
+QUESTION_QUEUE_SIZE = 5
+# Random chunks combined into the context of one batched quiz call
+QUIZ_CONTEXT_SAMPLES = 3
+# Leading context characters embedded as the quiz cache key; bounds the embedding input size
+QUIZ_CACHE_KEY_CHARS = 500
+# Concrete types drawn from when question_type is "mixed"
+MIXED_QUESTION_TYPES = ("multiple_choice", "true_false", "short_answer")
+
+# Compiled once at import rather than looked up / rebuilt on every call
+_JSON_FALLBACK_RE = re.compile(r'(\[.*?\]|\{.*?\})', re.DOTALL)
+_OPTION_PREFIX_RE = re.compile(r'^[a-d]\)\s*')
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+# JSON string values of "question" / "correct_answer" keys, escapes included
+_Q_RE = re.compile(r'"question"\s*:\s*"([^"\\]*(?:\\.[^"\\]*)*)"')
+_A_RE = re.compile(r'"correct_answer"\s*:\s*"([^"\\]*(?:\\.[^"\\]*)*)"')
+
+def _loads_json(text: str) -> Any:
+    """Parse well-formed JSON with orjson when available; repair it first only on failure."""
+    try:
+        if orjson is not None:
+            return orjson.loads(text.encode('utf-8'))
+        return json.loads(text)
+    except ValueError:
+        return json.loads(repair_json(text))
+
+
+def _decode_json_string(raw: str) -> Optional[str]:
+    """Decode a captured JSON string body; raw newlines/control characters are allowed, other bad escapes give None."""
+    try:
+        return json.loads(f'"{raw}"', strict=False)
+    except ValueError:
+        return None
+
+class _QuestionStreamParser:
+    """
+    Incrementally scans streamed LLM text and returns each complete top-level question
+    object (the items of a JSON array, or a lone object) as soon as its closing brace arrives.
+    Scanning starts at the <result> tag, or at the first '[' if no tag has been seen, so a
+    stray '{' in preamble or thinking text is skipped; a lone object is only taken after <result>.
+    """
+    _TAG = '<result>'
+
+    def __init__(self):
+        self._depth = 0
+        self._object_depth = None  # nesting depth at which question objects open
+        self._in_string = False
+        self._escape = False
+        self._capturing = False
+        self._buffer: List[str] = []
+        self._result_seen = False
+        self._tail = ''  # last few characters, to spot the tag across chunk boundaries
+
+    def _restart_after_tag(self) -> None:
+        # Anything scanned before the tag (e.g. a '[' in prose) was preamble
+        self._result_seen = True
+        self._depth = 0
+        self._object_depth = None
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> List[str]:
+        objects = []
+        for ch in text:
+            if not self._result_seen and not self._capturing:
+                self._tail = (self._tail + ch)[-len(self._TAG):]
+                if self._tail == self._TAG:
+                    self._restart_after_tag()
+                    continue
+            if self._capturing:
+                self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if self._object_depth is None:
+                if ch == '[':
+                    self._object_depth = 1
+                    self._depth = 1
+                    continue
+                if ch != '{' or not self._result_seen:
+                    continue
+                self._object_depth = 0
+            if ch == '"':
+                self._in_string = True
+            elif ch == '[' or ch == '{':
+                if ch == '{' and self._depth == self._object_depth and not self._capturing:
+                    self._capturing = True
+                    self._buffer = ['{']
+                self._depth += 1
+            elif ch == ']' or ch == '}':
+                self._depth -= 1
+                if ch == '}' and self._capturing and self._depth == self._object_depth:
+                    objects.append(''.join(self._buffer))
+                    self._capturing = False
+                    self._buffer = []
+        return objects
+
 class QuizAgent:
     """
     Agent for generating and evaluating quiz questions using an LLM and a knowledge retriever.
     """
-    def __init__(self, retriever, llm_provider: LiteLLMProvider):
+    def __init__(self, retriever, llm_provider: LiteLLMProvider, semantic_cache: Optional[SemanticCache] = None):
         self.retriever = retriever
-        self.question_history = []
+        self.question_history = deque(maxlen=QUESTION_HISTORY_SIZE)
+        # Rolling correctness of the last few answers, kept alongside the history for O(1) lookups
+        self._recent_correct = deque(maxlen=3)
+        # Pre-generated questions per (question_type, difficulty) for generate_question
+        self._question_queues: Dict[tuple, deque] = {}
         self.difficulty_adjustment = 0
         self.llm_provider = llm_provider
-        logging.info("Initializing QuizAgent (LLM lazy initialization)")
+        self.semantic_cache = semantic_cache
+        logger.info("Initializing QuizAgent (LLM lazy initialization)")
 
     def _normalize_options(self, question):
         if isinstance(question, dict) and 'options' in question and isinstance(question['options'], dict):
@@ -26,9 +147,8 @@ class QuizAgent:
         return question
 
     def _ensure_type_field(self, question, question_type):
-        import logging
         if isinstance(question, dict) and 'type' not in question:
-            logging.info(f"Adding missing 'type' field to question. Setting type to {question_type}.")
+            logger.info("Adding missing 'type' field to question. Setting type to %s.", question_type)
             question['type'] = question_type
         return question
 
@@ -42,11 +162,11 @@ class QuizAgent:
             required_fields.append("options")
         for field in required_fields:
             if field not in question:
-                logging.error(f"Missing required field '{field}' in question: {question}")
+                logger.error("Missing required field '%s' in question: %s", field, question)
                 return False
         if question_type == "multiple_choice":
             if not isinstance(question["options"], list) or len(question["options"]) != 4:
-                logging.error(f"'options' field must be a list of 4 items in multiple_choice question: {question}")
+                logger.error("'options' field must be a list of 4 items in multiple_choice question: %s", question)
                 return False
         return True
 
@@ -69,97 +189,310 @@ class QuizAgent:
                 else:
                     question[field] = "N/A"
         if corrected:
-            import logging
-            logging.warning(f"Auto-corrected missing fields in question: {question}")
+            logger.warning("Auto-corrected missing fields in question: %s", question)
         if not self._validate_question_schema(question, question_type):
-            logging.error(f"Invalid question schema detected. Returning fallback question. Question: {question}")
+            logger.error("Invalid question schema detected. Returning fallback question. Question: %s", question)
             return self._generate_fallback_question(question_type, question.get('difficulty', 'medium'))
+        # The correct answer never changes once served, so normalize it once here
+        question['_ca_norm'] = self._normalize_answer(question['correct_answer'])
+        question['_syn_norm'] = self._normalize_synonyms(question.get('synonyms'))
         return question
 
-    def generate_questions_batch_from_context(self, context: str, num_questions: int, question_type: str = "multiple_choice", difficulty: str = "medium") -> list:
-        import logging
-        logging.info(f"Generating batch of {num_questions} questions: type={question_type}, difficulty={difficulty}")
+    def generate_questions_batch_from_context(self, context: str, num_questions: int, question_type: str = "multiple_choice", difficulty: str = "medium", use_cache: bool = True) -> list:
+        difficulty = self._resolve_difficulty(difficulty)
+        logger.info("Generating batch of %d questions: type=%s, difficulty=%s", num_questions, question_type, difficulty)
         if not context:
             error_message = "No context found. The knowledge base is empty or retriever failed. Please upload documents."
-            logging.info(error_message)
+            logger.info(error_message)
             return [self._generate_fallback_question(question_type, difficulty, error_message=error_message)] * num_questions
 
-        prompt = quiz_prompt.format(
-            context=context,
-            difficulty=difficulty,
-            num_questions=num_questions,
-            question_type=question_type,
-            user_message=""
-        )
+        prompt = self._build_prompt(context, num_questions, question_type, difficulty)
         try:
-            logging.info("Calling LLM for batch question generation.")
-            answer = self.llm_provider.completion(prompt=prompt, temperature=0.7)
-            import re
-            questions = []
-            # Extract JSON between <result>...</result> tags if present
-            tag_match = re.search(r'<result>(.*?)</result>', answer, re.DOTALL)
-            if tag_match:
-                json_str = tag_match.group(1).strip()
-            else:
-                # Fallback: Try to extract a JSON list or object from the output
-                json_match = re.search(r'(\[.*?\]|\{.*?\})', answer, re.DOTALL)
-                json_str = json_match.group(1) if json_match else None
-            if json_str:
-                # Repair the JSON string before parsing
-                try:
-                    repaired_json = repair_json(json_str)
-                    questions = json.loads(repaired_json)
-                except Exception as e:
-                    logging.error(f"Failed to repair or parse JSON: {e}\nExtracted: {json_str}")
-            else:
-                logging.error(f"No JSON array or object found in LLM output. Raw output: {answer}")
-            # Salvage: If questions is not a list, try to extract valid question dicts
-            if not isinstance(questions, list):
-                questions = []
-            valid_questions = []
-            for q in questions:
-                processed = self._post_process_question(q, question_type)
-                # If fallback, skip
-                if not processed.get('question', '').startswith('No context available'):
-                    valid_questions.append(processed)
+            logger.info("Calling LLM for batch question generation.")
+            answer = self._cached_completion(prompt, context, question_type, difficulty, num_questions, use_cache=use_cache)
+            valid_questions = self._valid_questions(self._parse_questions(answer, question_type), question_type)
             if not valid_questions:
                 error_message = "LLM output was malformed or empty. Please try again or check your prompt/model settings."
-                logging.error(error_message)
+                logger.error(error_message)
                 return [self._generate_fallback_question(question_type, difficulty, error_message=error_message)] * num_questions
             if len(valid_questions) < num_questions:
-                logging.warning(f"Only {len(valid_questions)} valid questions recovered from LLM output out of {num_questions} requested.")
+                logger.warning("Only %d valid questions recovered from LLM output out of %d requested.", len(valid_questions), num_questions)
             return valid_questions
         except Exception as e:
-            logging.error(f"Error during batch question generation: {e}")
+            logger.error("Error during batch question generation: %s", e)
             error_message = f"Error during batch question generation: {e}"
             return [self._generate_fallback_question(question_type, difficulty, error_message=error_message)] * num_questions
 
+    def stream_questions_batch_from_context(self, context: str, num_questions: int, question_type: str = "multiple_choice", difficulty: str = "medium", use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_questions_batch_from_context: yields each question as
+        soon as its JSON object is complete in the LLM stream instead of after the full response.
+        With use_cache=False the semantic cache is neither read nor written (e.g. the user asked
+        for a new quiz on the same selection).
+        """
+        difficulty = self._resolve_difficulty(difficulty)
+        logger.info("Streaming batch of %d questions: type=%s, difficulty=%s", num_questions, question_type, difficulty)
+        if not context:
+            error_message = "No context found. The knowledge base is empty or retriever failed. Please upload documents."
+            yield from [self._generate_fallback_question(question_type, difficulty, error_message=error_message)] * num_questions
+            return
+        cache = self.semantic_cache if use_cache else None
+        # Request parameters must match exactly; only the context is matched semantically
+        cache_key = self._cache_key(context, question_type, difficulty)
+        cache_scope = (question_type, difficulty, num_questions)
+        cached = cache.lookup(cache_key, discriminator=cache_scope) if cache is not None else None
+        if cached is not None:
+            yield from self._valid_questions(self._parse_questions(cached, question_type), question_type)
+            return
+        prompt = self._build_prompt(context, num_questions, question_type, difficulty)
+        parser = _QuestionStreamParser()
+        chunks = []
+        produced = 0
+        error_message = "LLM output was malformed or empty. Please try again or check your prompt/model settings."
+        try:
+            for chunk in self.llm_provider.stream_completion(prompt=prompt, system=QUIZ_SYSTEM_PROMPT, temperature=0.7):
+                chunks.append(chunk)
+                for object_str in parser.feed(chunk):
+                    question = _loads_json(object_str)
+                    for processed in self._valid_questions([question], question_type):
+                        produced += 1
+                        yield processed
+            if not produced:
+                # Nothing complete was streamed (e.g. a lone object with no <result> tag); parse the whole response
+                for processed in self._valid_questions(self._parse_questions(''.join(chunks), question_type), question_type):
+                    produced += 1
+                    yield processed
+            if produced and cache is not None:
+                cache.store(cache_key, ''.join(chunks), discriminator=cache_scope)
+        except Exception as e:
+            logger.error("Error during streamed question generation: %s", e)
+            error_message = f"Error during batch question generation: {e}"
+        if not produced:
+            yield self._generate_fallback_question(question_type, difficulty, error_message=error_message)
+
+    def _build_prompt(self, context: str, num_questions: int, question_type: str, difficulty: str) -> str:
+        # Only the per-request user message; QUIZ_SYSTEM_PROMPT is sent unchanged as the system message
+        return QUIZ_USER_PROMPT.format(
+            context=context,
+            difficulty=difficulty,
+            num_questions=num_questions,
+            question_type=question_type
+        )
+
+    @staticmethod
+    def _cache_key(context: str, question_type: str, difficulty: str) -> str:
+        # Only a bounded prefix is embedded, so large document selections stay within the model's input limit
+        return f"{question_type}|{difficulty}|{context[:QUIZ_CACHE_KEY_CHARS]}"
+
+    def _cached_completion(self, prompt: str, context: str, question_type: str, difficulty: str, num_questions: int, use_cache: bool = True) -> str:
+        """Call the LLM, answering from the semantic cache when a near-identical request was seen before."""
+        def compute() -> str:
+            return self.llm_provider.completion(prompt=prompt, system=QUIZ_SYSTEM_PROMPT, temperature=0.7)
+        if self.semantic_cache is None or not use_cache:
+            return compute()
+        # Request parameters must match exactly; only the context is matched semantically
+        return self.semantic_cache.get_or_compute(
+            self._cache_key(context, question_type, difficulty), compute, discriminator=(question_type, difficulty, num_questions)
+        )
+
+    def _extract_json_from_response(self, answer: str) -> Optional[str]:
+        """
+        Locate the JSON payload in raw LLM output: <result>...</result> tags first, then a
+        ```json fenced block, then the first bracketed span. Tags and fences are found with
+        str.find, no regex.
+        """
+        if '[' not in answer and '{' not in answer:
+            return None
+        # The quiz prompt asks for <result> tags, so this is the common case; a missing
+        # closing tag (truncated output) takes the rest of the response
+        tag_start = answer.find('<result>')
+        if tag_start != -1:
+            tag_start += len('<result>')
+            tag_end = answer.find('</result>', tag_start)
+            return answer[tag_start:tag_end if tag_end != -1 else len(answer)].strip()
+        fence_start = answer.find('```json')
+        if fence_start != -1:
+            fence_start += len('```json')
+            fence_end = answer.find('```', fence_start)
+            return answer[fence_start:fence_end if fence_end != -1 else len(answer)].strip()
+        # Fallback: take the outermost JSON list or object so nested brackets stay intact
+        starts = [i for i in (answer.find('['), answer.find('{')) if i != -1]
+        start = min(starts)
+        end = answer.rfind(']' if answer[start] == '[' else '}')
+        if end > start:
+            return answer[start:end + 1]
+        json_match = _JSON_FALLBACK_RE.search(answer)
+        return json_match.group(1) if json_match else None
+
+    def _parse_questions(self, answer: str, question_type: Optional[str] = None) -> List[Any]:
+        """
+        Extract the question JSON from raw LLM output. A single question object is
+        wrapped in a list; anything unparseable yields an empty list, or for question
+        types without options, whatever question/answer pairs can be salvaged.
+        """
+        questions = []
+        json_str = self._extract_json_from_response(answer)
+        if json_str:
+            # Parse directly, repairing the JSON string only if that fails
+            try:
+                questions = _loads_json(json_str)
+            except Exception as e:
+                logger.error("Failed to repair or parse JSON: %s", e)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Extracted: %s", json_str)
+        else:
+            logger.error("No JSON array or object found in LLM output.")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Raw output: %s", answer)
+        if isinstance(questions, dict):
+            questions = [questions]
+        # Salvage: If questions is not a list, try to extract valid question dicts
+        if not isinstance(questions, list):
+            questions = []
+        if not questions and question_type != "multiple_choice":
+            questions = self._salvage_questions(answer)
+        return questions
+
+    def _salvage_questions(self, answer: str) -> List[Dict[str, Any]]:
+        """
+        Recover "question"/"correct_answer" pairs from malformed JSON with two precompiled
+        regexes over the whole response. Not used for multiple choice, which also needs options.
+        """
+        pairs = zip(map(_decode_json_string, _Q_RE.findall(answer)), map(_decode_json_string, _A_RE.findall(answer)))
+        # A pair whose text still fails to decode is skipped rather than aborting the salvage
+        salvaged = [{'question': q, 'correct_answer': a} for q, a in pairs if q is not None and a is not None]
+        if salvaged:
+            logger.warning("Salvaged %d question(s) from malformed LLM output", len(salvaged))
+        return salvaged
+
+    def _valid_questions(self, questions: List[Any], question_type: str) -> List[Dict[str, Any]]:
+        valid_questions = []
+        for q in questions:
+            processed = self._post_process_question(q, question_type)
+            # If fallback, skip
+            if not processed.get('question', '').startswith('No context available'):
+                valid_questions.append(processed)
+        return valid_questions
+
+    async def _generate_async(self, question_type: str, difficulty: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Generate one question from its own random context, holding a semaphore slot for the LLM call."""
+        context = self.retriever.get_random_context()
+        if not context:
+            return self._generate_fallback_question(question_type, difficulty)
+        prompt = self._build_prompt(context, 1, question_type, difficulty)
+        try:
+            async with semaphore:
+                # The provider call is blocking; run it on a worker thread so requests overlap
+                answer = await asyncio.to_thread(self._cached_completion, prompt, context, question_type, difficulty, 1)
+            valid_questions = self._valid_questions(self._parse_questions(answer, question_type), question_type)
+            if valid_questions:
+                return valid_questions[0]
+            error_message = "LLM output was malformed or empty. Please try again or check your prompt/model settings."
+        except Exception as e:
+            logger.error("Error during question generation: %s", e)
+            error_message = f"Error during question generation: {e}"
+        return self._generate_fallback_question(question_type, difficulty, error_message=error_message)
+
+    def generate_questions(self, n: int, question_type: str = "multiple_choice", difficulty: str = "medium", max_concurrency: int = MAX_CONCURRENT_GENERATIONS) -> List[Dict[str, Any]]:
+        """
+        Generate n questions, each from its own random context, with up to max_concurrency
+        LLM requests in flight so their network latency overlaps instead of adding up.
+        """
+        difficulty = self._resolve_difficulty(difficulty)
+        logger.info("Generating %d questions concurrently: type=%s, difficulty=%s", n, question_type, difficulty)
+        # "mixed" picks every question's type up front so all of them can be requested at once
+        if question_type == "mixed":
+            question_types = random.choices(MIXED_QUESTION_TYPES, k=n)
+        else:
+            question_types = [question_type] * n
+
+        async def _gather():
+            semaphore = asyncio.Semaphore(max_concurrency)
+            return await asyncio.gather(*(self._generate_async(t, difficulty, semaphore) for t in question_types))
+
+        return list(asyncio.run(_gather()))
+
+    def generate_quiz(self, n: int, question_type: str = "multiple_choice", difficulty: str = "medium") -> List[Dict[str, Any]]:
+        """
+        Generate n questions with one batched LLM call, so the static prompt block is sent
+        (and billed) once rather than once per question. Draws a few random contexts for variety.
+        """
+        contexts = []
+        for _ in range(min(n, QUIZ_CONTEXT_SAMPLES)):
+            context = self.retriever.get_random_context()
+            if context and context not in contexts:
+                contexts.append(context)
+        if not contexts:
+            return [self._generate_fallback_question(question_type, difficulty)] * n
+        return self.generate_questions_batch_from_context("\n\n".join(contexts), n, question_type, difficulty)
+
+    def generate_question(self, question_type: str = "multiple_choice", difficulty: str = "medium") -> Dict[str, Any]:
+        """
+        Return the next question, served from a queue refilled by one generate_quiz call
+        per QUESTION_QUEUE_SIZE questions. Mixed mode refills with concurrent single-type
+        requests via generate_questions instead.
+        """
+        difficulty = self._resolve_difficulty(difficulty)
+        queue = self._question_queues.setdefault((question_type, difficulty), deque())
+        if not queue:
+            if question_type == "mixed":
+                questions = self.generate_questions(QUESTION_QUEUE_SIZE, question_type, difficulty)
+            else:
+                questions = self.generate_quiz(QUESTION_QUEUE_SIZE, question_type, difficulty)
+            fresh = [q for q in questions if q.get('source') != 'System']
+            if not fresh:
+                # Fallback/error questions are returned directly, never queued
+                return questions[0]
+            queue.extend(fresh)
+        return queue.popleft()
+
     def _normalize_answer(self, answer: Any) -> str:
         if isinstance(answer, bool):
             return str(answer).lower()  # 'true' or 'false'
         if answer is None:
             return ""
-        answer = str(answer).strip().lower()
-        answer = re.sub(r'^[a-d]\)\s*', '', answer)  # Remove 'A) ', 'B) ', etc.
-        answer = answer.translate(str.maketrans('', '', string.punctuation))
+        answer = str(answer).strip().casefold()
+        answer = _OPTION_PREFIX_RE.sub('', answer)  # Remove 'A) ', 'B) ', etc.
+        answer = answer.translate(_PUNCTUATION_TABLE)
         answer = answer.strip()
         return answer
 
     def check_answer(self, user_answer: str, question_data: Dict[str, Any]) -> bool:
-        correct = question_data.get("correct_answer", "")
         user_norm = self._normalize_answer(user_answer)
-        correct_norm = self._normalize_answer(correct)
+        correct_norm = question_data.get("_ca_norm")
+        if correct_norm is None:
+            correct_norm = self._normalize_answer(question_data.get("correct_answer", ""))
         # Check synonyms if provided
-        synonyms = question_data.get("synonyms", [])
-        if isinstance(synonyms, list):
-            synonyms_norm = [self._normalize_answer(s) for s in synonyms]
-        else:
-            synonyms_norm = []
+        synonyms_norm = question_data.get("_syn_norm")
+        if synonyms_norm is None:
+            synonyms_norm = self._normalize_synonyms(question_data.get("synonyms"))
         return user_norm == correct_norm or user_norm in synonyms_norm
 
+    def _normalize_synonyms(self, synonyms: Any) -> frozenset:
+        if not isinstance(synonyms, list):
+            return frozenset()
+        return frozenset(self._normalize_answer(s) for s in synonyms)
+
+    def add_question_to_history(self, question_data: Dict[str, Any], user_answer: Any, is_correct: bool) -> None:
+        """Record an answered question; the bounded deque drops the oldest entry in O(1)."""
+        self.question_history.append({
+            'question': question_data.get('question'),
+            'type': question_data.get('type'),
+            'difficulty': question_data.get('difficulty'),
+            'user_answer': user_answer,
+            'correct': is_correct
+        })
+        self._recent_correct.append(bool(is_correct))
+
     def _get_adaptive_difficulty(self) -> str:
-        # Adaptive difficulty is not implemented
-        return "medium"
+        # Step difficulty with the last three answers: all right -> hard, two -> medium, otherwise easy
+        if len(self._recent_correct) < self._recent_correct.maxlen:
+            return "medium"
+        correct = sum(self._recent_correct)
+        return "hard" if correct >= 3 else "medium" if correct >= 2 else "easy"
+
+    def _resolve_difficulty(self, difficulty: str) -> str:
+        return self._get_adaptive_difficulty() if difficulty == "adaptive" else difficulty
 
     def _generate_fallback_question(self, question_type: str, difficulty: str, error_message: str = "") -> Dict[str, Any]:
         message = error_message if error_message else "No context available. Please upload documents to generate quiz questions."
@@ -174,17 +507,15 @@ class QuizAgent:
         }
 
     def get_aggregated_context(self, selected_documents: list) -> str:
-        import logging
-        logging.info(f"Aggregating context for selected_documents: {selected_documents}")
         """
         Aggregate all content from selected documents into a single string using vector store filtering.
         """
+        logger.info("Aggregating context for selected_documents: %s", selected_documents)
         try:
-            chunks = self.retriever.get_all_chunks(selected_documents=selected_documents)
-            logging.info(f"Fetched {len(chunks)} chunks from vector store.")
-            if not chunks:
-                return ""
-            return " ".join(chunk['content'] for chunk in chunks)
+            # Stream pages from the store, keeping only the text rather than every chunk's metadata dict
+            contents = [chunk['content'] for chunk in self.retriever.iter_all_chunks(selected_documents=selected_documents)]
+            logger.info("Fetched %d chunks from vector store.", len(contents))
+            return " ".join(contents)
         except Exception as e:
-            logging.error(f"QuizAgent: Error retrieving aggregated context: {e}")
+            logger.error("QuizAgent: Error retrieving aggregated context: %s", e)
             return ""
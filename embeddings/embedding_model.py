@@ -1,13 +1,20 @@
+import functools
 import logging
+import os
+import threading
+from collections import OrderedDict
 from typing import Optional, List
 from llm.litellm_provider import LiteLLMProvider
 
+# Set EMBEDDING_BACKEND=onnx to run sentence-transformers models locally through ONNX Runtime
+EMBEDDING_BACKEND_ENV = "EMBEDDING_BACKEND"
+
 class LiteLLMEmbeddings:
     """
     LangChain-compatible embedding wrapper using LiteLLMProvider (Ollama backend).
     Implements embed_query and embed_documents for compatibility with Chroma/VectorStore.
     """
-    def __init__(self, model_name: str = "ollama/nomic-embed-text", api_base: str = "http://localhost:11434", api_key: Optional[str] = None):
+    def __init__(self, model_name: str = "ollama/nomic-embed-text", api_base: str = "http://localhost:11434", api_key: Optional[str] = None, batch_size: int = 32, query_cache_size: int = 256):
         self.provider = LiteLLMProvider(
             api_key=api_key,
             api_base=api_base,
@@ -15,12 +22,27 @@ class LiteLLMEmbeddings:
         )
         self.model_name = model_name
         self.api_base = api_base
+        self.batch_size = batch_size
+        # LRU of recent query vectors; repeated searches/topics skip the embedding round-trip
+        self.query_cache_size = query_cache_size
+        self._query_cache: OrderedDict = OrderedDict()
+        self._query_cache_lock = threading.Lock()
 
     def embed_query(self, text: str) -> List[float]:
+        with self._query_cache_lock:
+            cached = self._query_cache.get(text)
+            if cached is not None:
+                self._query_cache.move_to_end(text)
+                return cached
         # LiteLLMProvider.embed expects a list of strings
         try:
             result = self.provider.embed([text])
             if result and isinstance(result, list) and len(result) > 0:
+                if self.query_cache_size > 0:
+                    with self._query_cache_lock:
+                        self._query_cache[text] = result[0]
+                        if len(self._query_cache) > self.query_cache_size:
+                            self._query_cache.popitem(last=False)
                 return result[0]
             else:
                 raise ValueError("No embedding returned from LiteLLMProvider")
@@ -29,12 +51,32 @@ class LiteLLMEmbeddings:
             return []
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Embed in length-sorted batches so each request pads to a similar length,
+        # then restore the caller's order
         try:
-            return self.provider.embed(texts)
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            embeddings: List[List[float]] = [[] for _ in texts]
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                vectors = self.provider.embed([texts[i] for i in batch])
+                for i, vector in zip(batch, vectors):
+                    embeddings[i] = vector
+            return embeddings
         except Exception as e:
             logging.error(f"LiteLLMEmbeddings.embed_documents failed: {e}")
             return [[] for _ in texts]
 
+@functools.lru_cache(maxsize=8)
+def _cached_embeddings(backend: str, model_name: str, api_base: str, api_key: Optional[str]):
+    """
+    Process-wide embedding backends keyed by configuration, so Streamlit reruns and new
+    sessions reuse already-loaded model weights instead of constructing them again.
+    """
+    if backend == "onnx":
+        from embeddings.onnx_embeddings import ONNXMiniLMEmbeddings
+        return ONNXMiniLMEmbeddings(model_name=model_name)
+    return LiteLLMEmbeddings(model_name=model_name, api_base=api_base, api_key=api_key)
+
 class EmbeddingModel:
     """
     Handles initialization and access to the LiteLLM embedding model for document embeddings.
@@ -53,18 +95,11 @@ class EmbeddingModel:
             try:
                 if not self.embeddings:
                     logging.info(f"Initializing LiteLLM embeddings: {self.model_name} via {self.api_base} (attempt {attempt + 1}/{max_retries})")
-                    self.embeddings = LiteLLMEmbeddings(
-                        model_name=self.model_name,
-                        api_base=self.api_base,
-                        api_key=self.api_key
-                    )
-                    # Test the embeddings with a simple query
-                    test_embedding = self.embeddings.embed_query("test")
-                    if test_embedding and len(test_embedding) > 0:
-                        logging.info("LiteLLMEmbeddings initialized and tested successfully")
-                        return
-                    else:
-                        raise ValueError("Embedding test failed - returned empty or invalid embedding")
+                    # No "test" embedding round-trip here: KnowledgeManager validates the model
+                    # once before its first write, and real calls surface errors themselves
+                    self.embeddings = self._create_embeddings()
+                    logging.info("Embeddings initialized successfully")
+                    return
             except Exception as e:
                 logging.error(f"Failed to initialize LiteLLM embeddings (attempt {attempt + 1}/{max_retries}): {e}")
                 self.embeddings = None
@@ -74,6 +109,12 @@ class EmbeddingModel:
                 else:
                     logging.error(f"All {max_retries} attempts failed. Embeddings unavailable.")
 
+    def _create_embeddings(self):
+        model_name = self.model_name.removeprefix("huggingface/")
+        if os.getenv(EMBEDDING_BACKEND_ENV, "").lower() == "onnx" and model_name.startswith("sentence-transformers/"):
+            return _cached_embeddings("onnx", model_name, self.api_base, self.api_key)
+        return _cached_embeddings("litellm", self.model_name, self.api_base, self.api_key)
+
     def get(self) -> Optional[LiteLLMEmbeddings]:
         if self.embeddings is None:
             logging.warning("Embeddings not initialized. Attempting re-initialization...")
@@ -0,0 +1,201 @@
+import logging
+import os
+from typing import List, Optional, Sequence
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is an optional accelerator for pooling large batches
+    njit = None
+
+DEFAULT_ONNX_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "./onnx_models")
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model_quantized.onnx"
+# Maximum allowed 1 - cosine(fp32, int8) on the validation sample before int8 is enabled
+MAX_QUANTIZATION_DRIFT = 1e-3
+
+# Fallback validation sample used when no document chunks are supplied
+QUANTIZATION_SAMPLE = (
+    "The mitochondria is the powerhouse of the cell and produces ATP through respiration.",
+    "In 1789 the French Revolution began with the storming of the Bastille.",
+    "A binary search tree keeps its keys in sorted order to allow logarithmic lookups.",
+    "Photosynthesis converts light energy, water and carbon dioxide into glucose and oxygen.",
+    "The derivative of a function measures how its output changes as its input changes.",
+    "Supply and demand determine the equilibrium price of goods in a competitive market.",
+    "Shakespeare wrote Hamlet, a tragedy about the Prince of Denmark seeking revenge.",
+    "TCP guarantees ordered delivery of bytes, while UDP trades reliability for latency.",
+    "Plate tectonics explains earthquakes, volcanoes and the drift of the continents.",
+    "Q: What is the capital of Australia? A: Canberra.",
+)
+
+if njit is not None:
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _fused_pool_norm(hidden, mask, out):
+        """Masked mean-pool (B, T, D) -> (B, D) and L2-normalize in one read of hidden"""
+        batch, tokens, dim = hidden.shape
+        for b in prange(batch):
+            count = 0.0
+            for d in range(dim):
+                out[b, d] = 0.0
+            for t in range(tokens):
+                weight = mask[b, t]
+                if weight != 0.0:
+                    count += weight
+                    for d in range(dim):
+                        out[b, d] += hidden[b, t, d] * weight
+            # The 1/count mean scale cancels under normalization; only guard empty masks
+            if count == 0.0:
+                continue
+            sq = 0.0
+            for d in range(dim):
+                sq += out[b, d] * out[b, d]
+            scale = 1.0 / np.sqrt(max(sq, 1e-24))
+            for d in range(dim):
+                out[b, d] *= scale
+else:
+    _fused_pool_norm = None
+
+def _pool_and_normalize(hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Attention-masked mean pooling followed by L2 normalization"""
+    if _fused_pool_norm is not None:
+        out = np.empty((hidden.shape[0], hidden.shape[2]), dtype=np.float32)
+        _fused_pool_norm(np.ascontiguousarray(hidden), np.ascontiguousarray(mask), out)
+        return out
+    mask = mask[:, :, None]
+    pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    return pooled
+
+def _cpu_supports_vnni() -> bool:
+    """
+    Return True when the CPU exposes AVX-512 VNNI (int8 dot-product instructions), read from the
+    kernel's /proc/cpuinfo flags. Elsewhere this returns False; set ONNX_QUANTIZE to opt in.
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return "avx512_vnni" in line.split(":", 1)[1].split()
+    except OSError:
+        pass
+    return False
+
+class ONNXMiniLMEmbeddings:
+    """
+    LangChain-compatible embedding wrapper running a sentence-transformers model through ONNX Runtime on CPU.
+    Mean-pools token states over the attention mask and L2-normalizes, matching sentence-transformers output.
+    On CPUs with AVX-512 VNNI the graph is dynamically quantized to int8 once the drift check passes.
+    """
+    def __init__(
+        self,
+        model_name: str = DEFAULT_ONNX_MODEL,
+        batch_size: int = 32,
+        max_length: int = 256,
+        quantize: Optional[bool] = None,
+        validation_texts: Optional[Sequence[str]] = None
+    ):
+        # Heavy optional dependencies are only imported when the ONNX backend is selected
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self._session_options = ort.SessionOptions()
+        self._session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session_options.intra_op_num_threads = os.cpu_count() or 1
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.quantized = False
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        model_dir = self._export_model(model_name)
+        self.model = self._load_model(model_dir, FP32_MODEL_FILE)
+        if quantize is None:
+            env_value = os.getenv("ONNX_QUANTIZE")
+            quantize = env_value.lower() in ("1", "true", "yes") if env_value else _cpu_supports_vnni()
+        if quantize:
+            self._enable_int8(model_dir, validation_texts or QUANTIZATION_SAMPLE)
+        logging.info(f"ONNXMiniLMEmbeddings loaded {model_name} (int8={self.quantized}) on CPUExecutionProvider")
+
+    def _export_model(self, model_name: str) -> str:
+        """Export the checkpoint to ONNX once and reuse the cached graph afterwards."""
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+        model_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "__"))
+        if not os.path.exists(os.path.join(model_dir, FP32_MODEL_FILE)):
+            model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+            model.save_pretrained(model_dir)
+            self.tokenizer.save_pretrained(model_dir)
+        return model_dir
+
+    def _load_model(self, model_dir: str, file_name: str):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+        return ORTModelForFeatureExtraction.from_pretrained(
+            model_dir,
+            file_name=file_name,
+            provider="CPUExecutionProvider",
+            session_options=self._session_options
+        )
+
+    def _enable_int8(self, model_dir: str, validation_texts: Sequence[str]) -> None:
+        """Quantize MatMul/Gemm weights to int8 and switch to that graph if cosine drift stays below the bound."""
+        int8_path = os.path.join(model_dir, INT8_MODEL_FILE)
+        if not os.path.exists(int8_path):
+            try:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+
+                quantize_dynamic(
+                    os.path.join(model_dir, FP32_MODEL_FILE),
+                    int8_path,
+                    weight_type=QuantType.QInt8,
+                    op_types_to_quantize=["MatMul", "Gemm"],
+                    per_channel=True
+                )
+                int8_model = self._load_model(model_dir, INT8_MODEL_FILE)
+                texts = list(validation_texts)[:100]
+                reference = self._encode(texts)
+                candidate = self._encode(texts, model=int8_model)
+                drift = float(np.max(1.0 - np.sum(reference * candidate, axis=1)))
+                if drift >= MAX_QUANTIZATION_DRIFT:
+                    logging.warning(f"int8 embedding drift {drift:.2e} exceeds {MAX_QUANTIZATION_DRIFT:.0e}; keeping FP32")
+                    os.remove(int8_path)
+                    return
+                logging.info(f"int8 embedding drift {drift:.2e} on {len(texts)} samples; enabling quantized model")
+            except Exception as e:
+                logging.warning(f"Dynamic int8 quantization failed, keeping FP32: {e}")
+                if os.path.exists(int8_path):
+                    os.remove(int8_path)
+                return
+            self.model = int8_model
+        else:
+            # The cached int8 graph is only kept after it passed validation
+            self.model = self._load_model(model_dir, INT8_MODEL_FILE)
+        self.quantized = True
+
+    def _encode(self, texts: List[str], model=None) -> np.ndarray:
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+        outputs = (model or self.model)(**inputs)
+        hidden = np.asarray(outputs.last_hidden_state, dtype=np.float32)
+        return _pool_and_normalize(hidden, inputs["attention_mask"].astype(np.float32))
+
+    def embed_query(self, text: str) -> List[float]:
+        try:
+            return self._encode([text])[0].tolist()
+        except Exception as e:
+            logging.error(f"ONNXMiniLMEmbeddings.embed_query failed: {e}")
+            return []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Length-sorted batches keep padding (and wasted FLOPs) per batch small
+        try:
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            embeddings: List[List[float]] = [[] for _ in texts]
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                vectors = self._encode([texts[i] for i in batch])
+                for i, vector in zip(batch, vectors):
+                    embeddings[i] = vector.tolist()
+            return embeddings
+        except Exception as e:
+            logging.error(f"ONNXMiniLMEmbeddings.embed_documents failed: {e}")
+            return [[] for _ in texts]
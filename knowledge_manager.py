@@ -1,14 +1,54 @@
 import logging
 import hashlib
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import io
+import mmap
+import os
 import random
-from services.document_processor import DocumentProcessor   
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
+import numpy as np
+from services.document_processor import DocumentProcessor, file_group_id
 from services.vector_store_service import VectorStoreService
 from embeddings.embedding_model import EmbeddingModel
 from retrievers.vector_retriever import VectorStoreRetriever
+from vector_stores.chroma_store import relevance_from_distance
 from langchain.schema import Document
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is an optional accelerator for very large corpora
+    njit = None
+
+# Bytes read and fed to the hash function per update when hashing uploads
+HASH_CHUNK_SIZE = 1 << 20
+# Upper bound on files loaded and split concurrently
+MAX_INGEST_WORKERS = 8
+
+# Corpus size above which the fused Numba kernel beats separate NumPy reductions
+NUMBA_STATS_MIN_DOCS = 100_000
+
+# Single worker so vector store clears run off the UI thread but never overlap
+_CLEAR_POOL = ThreadPoolExecutor(max_workers=1)
+
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def _length_stats_kernel(lengths, threshold):
+        """Single parallel pass returning (total chars, valid chunks, chunks >= threshold)"""
+        total = 0
+        valid = 0
+        suitable = 0
+        for i in prange(lengths.shape[0]):
+            length = lengths[i]
+            if length >= 0:
+                total += length
+                valid += 1
+                if length >= threshold:
+                    suitable += 1
+        return total, valid, suitable
+else:
+    _length_stats_kernel = None
+
 class KnowledgeManager:
     """
     Orchestrates document ingestion, embedding, vector storage, and retrieval using modular components.
@@ -33,18 +73,126 @@ class KnowledgeManager:
         else:
             model_name = model
         self.embedder = EmbeddingModel(model_name=model_name, api_base=base_url, api_key=api_key)
+        self._embed_lock = threading.Lock()
+        self._embeddings = None
+        self._embeddings_validated = False
         self._last_embedding_config = {
             'provider': provider,
             'model': model,
             'base_url': base_url,
             'api_key': api_key
         }
+        self._rng = random.Random()
+        self._pending_clear = None
         self.documents = []
         self.is_preloaded = False
         self.vector_store = None
         self.retriever = None
         self._preload_existing_documents()
 
+    @property
+    def documents(self) -> List[Any]:
+        return self._documents
+
+    @documents.setter
+    def documents(self, docs: List[Any]):
+        self._documents = docs
+        self._rebuild_document_index()
+
+    def _rebuild_document_index(self):
+        """Recompute the per-document column arrays (-1 length marks invalid entries)"""
+        docs = self._documents if isinstance(self._documents, list) else []
+        self._doc_lengths, self._doc_sources, self._file_hashes = self._document_columns(docs)
+        self._long_doc_indices = {}
+
+    def _document_columns(self, docs: List[Any]):
+        """Build (lengths, source names, file hashes) arrays for a list of documents"""
+        lengths = np.fromiter(
+            (len(doc.page_content) if self.is_valid_doc(doc) else -1 for doc in docs),
+            dtype=np.int64,
+            count=len(docs)
+        )
+        sources = np.empty(len(docs), dtype=object)
+        sources[:] = [self._source_name(doc) for doc in docs]
+        hashes = np.empty(len(docs), dtype=object)
+        hashes[:] = [doc.metadata.get('file_hash') or '' if self.is_valid_doc(doc) else '' for doc in docs]
+        return lengths, sources, hashes
+
+    def _source_name(self, doc) -> str:
+        """Resolve the source file name recorded in a document's metadata ('' if none)"""
+        if not self.is_valid_doc(doc):
+            return ''
+        for key in ('source_file', 'original_filename', 'source'):
+            if key in doc.metadata:
+                return str(doc.metadata[key]) if doc.metadata[key] is not None else ''
+        return ''
+
+    def _index_new_documents(self, docs: List[Any]):
+        """Extend the column arrays for documents appended to self.documents"""
+        lengths, sources, hashes = self._document_columns(docs)
+        self._doc_lengths = np.concatenate((self._doc_lengths, lengths))
+        self._doc_sources = np.concatenate((self._doc_sources, sources))
+        self._file_hashes = np.concatenate((self._file_hashes, hashes))
+        self._long_doc_indices = {}
+
+    def _ensure_document_index(self):
+        """Rebuild the column arrays if self.documents was mutated in place"""
+        if len(self._doc_lengths) != len(self._documents):
+            self._rebuild_document_index()
+
+    def _drop_document_indices(self, indices):
+        """Remove documents by position from the list and every column array"""
+        keep = np.ones(len(self._documents), dtype=bool)
+        keep[indices] = False
+        self._documents = [doc for doc, kept in zip(self._documents, keep.tolist()) if kept]
+        self._doc_lengths = self._doc_lengths[keep]
+        self._doc_sources = self._doc_sources[keep]
+        self._file_hashes = self._file_hashes[keep]
+        self._long_doc_indices = {}
+
+    def _suitable_indices(self, min_length: int) -> np.ndarray:
+        """Positions of documents at least min_length long (any valid one if none qualify), cached per threshold"""
+        self._ensure_document_index()
+        indices = self._long_doc_indices.get(min_length)
+        if indices is None:
+            indices = np.flatnonzero(self._doc_lengths >= min_length)
+            if not indices.size:
+                # Fallback to any valid document
+                indices = np.flatnonzero(self._doc_lengths >= 0)
+            self._long_doc_indices[min_length] = indices
+        return indices
+
+    def _unique_sources(self) -> List[str]:
+        """Sorted distinct source names across the knowledge base"""
+        self._ensure_document_index()
+        sources = self._doc_sources[self._doc_sources.astype(bool)]
+        return np.unique(sources).tolist()
+
+    def _length_stats(self, threshold: int = 0):
+        """Return (total chars, valid chunks, chunks >= threshold) over the length index"""
+        self._ensure_document_index()
+        lengths = self._doc_lengths
+        if _length_stats_kernel is not None and lengths.size >= NUMBA_STATS_MIN_DOCS:
+            total, valid, suitable = _length_stats_kernel(lengths, threshold)
+            return int(total), int(valid), int(suitable)
+        valid_lengths = lengths[lengths >= 0]
+        return int(valid_lengths.sum()), int(valid_lengths.size), int(np.count_nonzero(valid_lengths >= threshold))
+
+    def _live_document_indices(self) -> List[int]:
+        """Positions of documents worth re-embedding: valid entries, one copy of each chunk per file"""
+        self._ensure_document_index()
+        keep = []
+        seen = set()
+        for i in np.flatnonzero(self._doc_lengths >= 0).tolist():
+            file_hash = self._file_hashes[i]
+            if file_hash:
+                key = (file_hash, self._documents[i].page_content)
+                if key in seen:
+                    continue
+                seen.add(key)
+            keep.append(i)
+        return keep
+
     def update_embedder(self, embedding_provider: str = '', embedding_model: str = '', embedding_base_url: str = '', embedding_api_key: str = ''):
         from constants import EMBEDDING_PROVIDER_DEFAULTS
         provider = str(embedding_provider) if embedding_provider else 'Ollama'
@@ -67,13 +215,40 @@ class KnowledgeManager:
             model_name = f"openai/{model}"
         else:
             model_name = model
-        self.embedder = EmbeddingModel(model_name=model_name, api_base=base_url, api_key=api_key)
+        with self._embed_lock:
+            self.embedder = EmbeddingModel(model_name=model_name, api_base=base_url, api_key=api_key)
+            self._embeddings = None
+            self._embeddings_validated = False
         self._last_embedding_config = new_config
+
+    def _get_validated_embeddings(self):
+        """
+        Return the embedding model, running the "test" probe only once per embedder.
+        Returns None if the model is unavailable; raises if the probe fails.
+        """
+        with self._embed_lock:
+            if self._embeddings_validated:
+                return self._embeddings
+            embeddings = self.embedder.get()
+            if not embeddings:
+                return None
+            test_embedding = embeddings.embed_query("test")
+            if not test_embedding or len(test_embedding) == 0:
+                raise ValueError("Embeddings returned empty result")
+            self._embeddings = embeddings
+            self._embeddings_validated = True
+            return embeddings
     
     def _preload_existing_documents(self):
         """Preload existing vector database if available"""
         self.metadata_out_of_sync = False
+        if not os.path.isdir(self.persist_directory) or not os.listdir(self.persist_directory):
+            # Cold start: nothing to load, so skip fetching and probing the embedding model
+            logging.info("No persisted vector store found to preload.")
+            return
         try:
+            # No "test" embedding probe here: loading needs no embedding call, and the first
+            # write validates the model via _get_validated_embeddings
             embeddings = self.embedder.get()
             if not embeddings:
                 logging.warning("Embeddings not available during preload. Vector store will not be loaded.")
@@ -85,6 +260,11 @@ class KnowledgeManager:
                 logging.info("Preloaded vectorstore and retriever.")
                 # Use Chroma as the source of truth for all documents
                 try:
+                    # count() is metadata-only; skip the full fetch for an empty collection
+                    if self.vector_store._collection.count() == 0:
+                        self.documents = []
+                        logging.info("Persisted vector store is empty; nothing to load.")
+                        return
                     # Chroma.get() returns a dict with 'documents' and 'metadatas' (lists)
                     result = self.vector_store.get()
                     docs = []
@@ -93,6 +273,7 @@ class KnowledgeManager:
                         for content, meta in zip(result['documents'], result['metadatas']):
                             docs.append(Document(page_content=content, metadata=meta))
                     self.documents = docs
+                    self.retriever.documents = self.documents
                     logging.info(f"Loaded {len(self.documents)} documents from Chroma vector store.")
                 except Exception as e:
                     self.documents = []
@@ -109,6 +290,10 @@ class KnowledgeManager:
     def is_metadata_out_of_sync(self):
         return getattr(self, 'metadata_out_of_sync', False)
     
+    def _ingest_one(self, uploaded_file, file_hash: str) -> List[Document]:
+        """Load and split a single upload; runs on the ingestion thread pool."""
+        return self.document_processor.process_uploaded_file(uploaded_file, extra_metadata={'file_hash': file_hash})
+
     def process_documents(self, uploaded_files) -> Dict[str, Any]:
         """Process uploaded documents and build vector database"""
         try:
@@ -137,63 +322,67 @@ class KnowledgeManager:
             all_texts = []
             processed_count = 0
             
-            for uploaded_file, file_hash in new_files:
-                texts = self.document_processor.process_uploaded_file(uploaded_file)
+            # Loading and parsing are I/O bound and release the GIL, so files are ingested concurrently;
+            # results are merged on this thread in upload order
+            results = [None] * len(new_files)
+            with ThreadPoolExecutor(max_workers=min(MAX_INGEST_WORKERS, len(new_files))) as executor:
+                futures = {
+                    executor.submit(self._ingest_one, uploaded_file, file_hash): i
+                    for i, (uploaded_file, file_hash) in enumerate(new_files)
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+            
+            chunk_ids = []
+            processed_hashes = []
+            for (uploaded_file, file_hash), texts in zip(new_files, results):
                 if texts:
-                    current_time = datetime.now().isoformat()
-                    file_size = len(uploaded_file.getbuffer())
-                    file_type = uploaded_file.name.split('.')[-1].lower()
-                    for text in texts:
-                        text.metadata.update({
-                            'file_hash': file_hash,
-                            'source_file': uploaded_file.name,
-                            'processed_date': current_time,
-                            'file_size': file_size,
-                            'file_type': file_type
-                        })
                     all_texts.extend(texts)
+                    chunk_ids.extend(f"{file_hash}:{i}" for i in range(len(texts)))
+                    processed_hashes.append(file_hash)
                     processed_count += 1
                     logging.info(f"Processed file: {uploaded_file.name} ({len(texts)} chunks)")
             
             if all_texts:
                 logging.info(f"[VectorStore] Total chunks to add: {len(all_texts)}")
-                for i, chunk in enumerate(all_texts):
-                    logging.info(f"[VectorStore] Chunk {i}: {chunk.page_content[:80]}... | Metadata: {chunk.metadata}")
-                # Create or update vector database
-                embeddings = self.embedder.get()
-                if not embeddings:
-                    logging.error("Embeddings not available. Cannot create vector store.")
+                # Per-chunk dumps are DEBUG-only; %.80s truncates inside the formatter, no slice copies
+                if logging.root.isEnabledFor(logging.DEBUG):
+                    for i, chunk in enumerate(all_texts):
+                        logging.debug("[VectorStore] Chunk %d: %.80s... | Metadata: %s", i, chunk.page_content, chunk.metadata)
+                # Create or update vector database, verifying embeddings are working
+                try:
+                    embeddings = self._get_validated_embeddings()
+                except Exception as e:
+                    logging.error(f"Embedding test failed: {e}")
                     return {
                         'success': False,
                         'new_files': 0,
                         'skipped_files': len(skipped_files),
                         'skipped_list': skipped_files,
-                        'error': 'Embedding model failed to initialize. Please check system logs.',
-                        'message': 'Cannot process documents without embedding model.'
+                        'error': f'Embedding model test failed: {str(e)}',
+                        'message': 'Embedding model is not working properly.'
                     }
-                
-                # Verify embeddings are working
-                try:
-                    test_embedding = embeddings.embed_query("test")
-                    if not test_embedding or len(test_embedding) == 0:
-                        raise ValueError("Embeddings returned empty result")
-                except Exception as e:
-                    logging.error(f"Embedding test failed: {e}")
+                if not embeddings:
+                    logging.error("Embeddings not available. Cannot create vector store.")
                     return {
                         'success': False,
                         'new_files': 0,
                         'skipped_files': len(skipped_files),
                         'skipped_list': skipped_files,
-                        'error': f'Embedding model test failed: {str(e)}',
-                        'message': 'Embedding model is not working properly.'
+                        'error': 'Embedding model failed to initialize. Please check system logs.',
+                        'message': 'Cannot process documents without embedding model.'
                     }
                 
                 # Create vector store
                 try:
-                    if self.vector_store is None:
-                        self.vector_store = self.vector_store_service.create_from_documents(all_texts, embeddings)
-                    else:
-                        self.vector_store_service.add_documents(all_texts)
+                    # Embed once in batches here, then write in bulk with precomputed vectors
+                    vectors = embeddings.embed_documents([text.page_content for text in all_texts])
+                    if not all(vectors):
+                        raise ValueError(f"Embedding failed for {sum(1 for v in vectors if not v)} chunk(s)")
+                    self._wait_for_pending_clear()
+                    self.vector_store = self.vector_store_service.add_embedded_documents(
+                        all_texts, vectors, chunk_ids, embeddings, create=self.vector_store is None
+                    )
                     self.vector_store_service.persist()
                 except Exception as e:
                     logging.error(f"Failed to create/update vector store: {e}")
@@ -208,7 +397,13 @@ class KnowledgeManager:
                 
                 # Update document list
                 if isinstance(self.documents, list):
+                    # A re-upload replaces the file's chunks in place (upserted ids), so drop its old in-memory copies
+                    self._ensure_document_index()
+                    stale = np.flatnonzero(np.isin(self._file_hashes, processed_hashes))
+                    if stale.size:
+                        self._drop_document_indices(stale)
                     self.documents.extend(all_texts)
+                    self._index_new_documents(all_texts)
                 else:
                     self.documents = list(all_texts)
                 
@@ -247,20 +442,16 @@ class KnowledgeManager:
     def process_text_content(self, text_content: str, source_name: str = "Sample Content"):
         """Process raw text content for demo purposes"""
         try:
-            embeddings = self.embedder.get()
-            if not embeddings:
-                # If embeddings are not initialized, try to re-instantiate
-                logging.warning("Embeddings not available, attempting to reinitialize...")
-                self.embedder = EmbeddingModel()
-                embeddings = self.embedder.get()
-                if not embeddings:
-                    raise Exception("Failed to initialize embedding model")
-            
-            # Test embeddings
             try:
-                test_embedding = embeddings.embed_query("test")
-                if not test_embedding or len(test_embedding) == 0:
-                    raise ValueError("Embeddings test failed")
+                embeddings = self._get_validated_embeddings()
+                if not embeddings:
+                    # If embeddings are not initialized, try to re-instantiate
+                    logging.warning("Embeddings not available, attempting to reinitialize...")
+                    with self._embed_lock:
+                        self.embedder = EmbeddingModel()
+                    embeddings = self._get_validated_embeddings()
+                    if not embeddings:
+                        raise Exception("Failed to initialize embedding model")
             except Exception as e:
                 logging.error(f"Embedding test failed: {e}")
                 raise Exception(f"Embedding model is not working: {e}")
@@ -269,6 +460,7 @@ class KnowledgeManager:
             
             # Create vector store with error handling
             try:
+                self._wait_for_pending_clear()
                 self.vector_store = self.vector_store_service.create_from_documents(texts, embeddings)
                 self.documents = texts
                 self.retriever = VectorStoreRetriever(self.vector_store, self.documents)
@@ -284,8 +476,30 @@ class KnowledgeManager:
     
     def _get_file_hash(self, uploaded_file) -> str:
         """Generate hash for uploaded file to avoid reprocessing"""
-        file_content = uploaded_file.getbuffer()
-        return hashlib.md5(file_content).hexdigest()
+        # MD5 stays the identifier: file_hash values already stored in Chroma metadata depend on it
+        file_hash = hashlib.md5()
+        try:
+            fileno = uploaded_file.fileno()
+        except (AttributeError, OSError):
+            fileno = None
+        if isinstance(fileno, int):
+            # Disk-backed file: hash through the page cache instead of copying it into memory
+            if os.fstat(fileno).st_size > 0:
+                with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+                    file_hash.update(mapped)
+            return file_hash.hexdigest()
+        if isinstance(uploaded_file, io.IOBase):
+            # Stream through a fixed-size buffer and restore the read position for the loaders
+            position = uploaded_file.tell()
+            uploaded_file.seek(0)
+            for chunk in iter(lambda: uploaded_file.read(HASH_CHUNK_SIZE), b''):
+                file_hash.update(chunk)
+            uploaded_file.seek(position)
+            return file_hash.hexdigest()
+        view = memoryview(uploaded_file.getbuffer())
+        for start in range(0, len(view), HASH_CHUNK_SIZE):
+            file_hash.update(view[start:start + HASH_CHUNK_SIZE])
+        return file_hash.hexdigest()
     
     def search_knowledge_base(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """Search the knowledge base for relevant information"""
@@ -295,15 +509,11 @@ class KnowledgeManager:
         try:
             results = self.vector_store.similarity_search_with_score(query, k=k)
             
-            formatted_results = []
-            for doc, score in results:
-                formatted_results.append({
-                    'content': doc.page_content,
-                    'metadata': doc.metadata,
-                    'relevance_score': score
-                })
-            
-            return formatted_results
+            vector_store = self.vector_store
+            return [
+                {'content': doc.page_content, 'metadata': doc.metadata, 'relevance_score': relevance_from_distance(vector_store, score)}
+                for doc, score in results
+            ]
             
         except Exception as e:
             logging.error(f"Error searching knowledge base: {str(e)}")
@@ -316,13 +526,9 @@ class KnowledgeManager:
         """Get random context from knowledge base for question generation"""
         if not self.documents or not isinstance(self.documents, list):
             return None
-        valid_docs = [doc for doc in self.documents if self.is_valid_doc(doc)]
-        suitable_docs = [doc for doc in valid_docs if isinstance(doc, Document) and len(doc.page_content) >= min_length]
-        if not suitable_docs:
-            suitable_docs = [doc for doc in valid_docs if isinstance(doc, Document)]
-        if suitable_docs:
-            selected_doc = random.choice(suitable_docs)
-            return selected_doc.page_content
+        idxs = self._suitable_indices(min_length)
+        if idxs.size:
+            return self.documents[int(idxs[self._rng.randrange(idxs.size)])].page_content
         return None
     
     def get_context_by_topic(self, topic: str, k: int = 3) -> List[str]:
@@ -339,17 +545,17 @@ class KnowledgeManager:
     
     def get_all_contexts(self) -> List[Dict[str, Any]]:
         """Get all document contexts with metadata"""
-        contexts = []
-        valid_docs = [doc for doc in self.documents if self.is_valid_doc(doc)]
-        for doc in valid_docs:
-            if not isinstance(doc, Document):
-                continue
-            contexts.append({
-                'content': doc.page_content,
-                'metadata': doc.metadata,
-                'length': len(doc.page_content)
-            })
-        return contexts
+        self._ensure_document_index()
+        return [
+            {'content': doc.page_content, 'metadata': doc.metadata, 'length': length}
+            for doc, length in zip(self.documents, self._doc_lengths.tolist())
+            if length >= 0
+        ]
+
+    def get_context_lengths_array(self) -> np.ndarray:
+        """Chunk lengths aligned with self.documents (-1 marks invalid entries); returned without copying"""
+        self._ensure_document_index()
+        return self._doc_lengths
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the knowledge base"""
@@ -362,39 +568,40 @@ class KnowledgeManager:
                 'topic_count': 0,
                 'source_files': []
             }
-        valid_docs = [doc for doc in self.documents if self.is_valid_doc(doc)]
-        valid_docs = [doc for doc in valid_docs if isinstance(doc, Document)]
-        total_chars = sum(len(doc.page_content) for doc in valid_docs)
-        avg_chunk_size = total_chars / len(valid_docs) if valid_docs else 0
-        source_files = set()
-        for doc in valid_docs:
-            if 'source_file' in doc.metadata:
-                source_files.add(doc.metadata['source_file'])
-            elif 'original_filename' in doc.metadata:
-                source_files.add(doc.metadata['original_filename'])
-            elif 'source' in doc.metadata:
-                source_files.add(doc.metadata['source'])
-        topic_count = min(len(source_files) * 3, len(valid_docs) // 2)
-        topic_count = max(topic_count, 1) if valid_docs else 0
+        total_chars, chunk_count, _ = self._length_stats()
+        avg_chunk_size = total_chars // chunk_count if chunk_count else 0
+        source_files = self._unique_sources()
+        topic_count = min(len(source_files) * 3, chunk_count // 2)
+        topic_count = max(topic_count, 1) if chunk_count else 0
         return {
             'doc_count': len(source_files),
-            'chunk_count': len(valid_docs),
+            'chunk_count': chunk_count,
             'total_chars': total_chars,
-            'avg_chunk_size': int(avg_chunk_size),
+            'avg_chunk_size': avg_chunk_size,
             'topic_count': topic_count,
-            'source_files': list(source_files)
+            'source_files': source_files
         }
     
     def clear_knowledge_base(self):
         """Clear the current knowledge base"""
         self.documents = []
-        # Use the vectorstore_service to clear all data from the vector store
+        # Clear the vector store in the background; the next write waits for it
+        self._pending_clear = _CLEAR_POOL.submit(self._clear_vector_store_data)
+        self.vector_store = None
+
+    def _clear_vector_store_data(self):
+        # Use the vector_store_service to clear all data from the vector store
         try:
             self.vector_store_service.clear_all_data()
             logging.info("Cleared all data from vector store using clear_all_data().")
         except Exception as e:
             logging.error(f"Error clearing all data from vector store: {e}")
-        self.vector_store = None
+
+    def _wait_for_pending_clear(self):
+        """Block until a background clear has finished before touching the store again"""
+        if self._pending_clear is not None:
+            self._pending_clear.result()
+            self._pending_clear = None
     
     def export_knowledge_base(self) -> Dict[str, Any]:
         """Export knowledge base for backup/sharing"""
@@ -412,24 +619,38 @@ class KnowledgeManager:
     
     def get_sources(self) -> List[str]:
         """Get list of all source documents"""
-        sources = set()
-        valid_docs = [doc for doc in self.documents if self.is_valid_doc(doc) and isinstance(doc, Document)]
-        for doc in valid_docs:
-            if 'source_file' in doc.metadata:
-                sources.add(doc.metadata['source_file'])
-            elif 'original_filename' in doc.metadata:
-                sources.add(doc.metadata['original_filename'])
-            elif 'source' in doc.metadata:
-                sources.add(doc.metadata['source'])
-        return sorted(list(sources))
+        return self._unique_sources()
     
-    def remove_processed_file(self, file_hash: str) -> bool:
-        """Remove a processed file from the knowledge base"""
+    def remove_processed_file(self, file_id: str) -> bool:
+        """
+        Remove a processed file from the knowledge base. file_id is the id the UI groups chunks
+        under (file_group_id: file_hash, else source_file, else original_filename). Invalid
+        entries are dropped from memory along the way. Returns False if no chunk matched.
+        """
         try:
-            # Remove documents from memory (this is a simplified approach)
-            self.documents = [doc for doc in self.documents 
-                            if self.is_valid_doc(doc) and isinstance(doc, Document) and doc.metadata.get('file_hash') != file_hash]
-            logging.info(f"Removed processed file with hash: {file_hash}")
+            self._ensure_document_index()
+            matched = self._file_hashes == file_id
+            # Chunks without a file_hash are grouped under a filename fallback; only those need a Python check
+            unhashed = np.flatnonzero((self._file_hashes == '') & (self._doc_lengths >= 0))
+            if unhashed.size:
+                matched[unhashed] = [file_group_id(self._documents[i].metadata) == file_id for i in unhashed.tolist()]
+            removed = int(np.count_nonzero(matched))
+            # Like the original list filter, also drop invalid (non-Document) entries while rewriting
+            indices = np.flatnonzero(matched | (self._doc_lengths < 0))
+            if indices.size:
+                self._drop_document_indices(indices)
+                if self.retriever:
+                    self.retriever.documents = self.documents
+            # Filtered delete in Chroma: only this file's chunks, no rebuild or re-embedding
+            if self.vector_store is not None:
+                self._wait_for_pending_clear()
+                removed += self.vector_store_service.delete_by_file_id(file_id)
+            if not removed:
+                logging.warning(f"No chunks found for processed file: {file_id}")
+                return False
+            if self.retriever:
+                self.retriever.clear_query_cache()
+            logging.info(f"Removed processed file: {file_id}")
             return True
         except Exception as e:
             logging.error(f"Error removing processed file: {e}")
@@ -438,14 +659,27 @@ class KnowledgeManager:
     def rebuild_vectorstore(self):
         """Rebuild the vectorstore from current documents"""
         try:
-            if not self.documents or not self.embedder.get():
+            embeddings = self.embedder.get()
+            if not self.documents or not embeddings:
+                return False
+
+            # Drop invalid entries and chunks duplicated by re-uploading a file so they are not re-embedded
+            live = self._live_document_indices()
+            if len(live) < len(self.documents):
+                live_set = set(live)
+                dropped = [i for i in range(len(self.documents)) if i not in live_set]
+                self._drop_document_indices(dropped)
+                logging.info(f"Dropped {len(dropped)} invalid or duplicate chunks before rebuilding")
+            if not self.documents:
                 return False
 
             # Clear existing vectorstore in-place
+            self._wait_for_pending_clear()
             self.vector_store_service.clear_all_data()
 
-            # Recreate vectorstore
-            self.vector_store = self.vector_store_service.create_from_documents(self.documents, self.embedder.get())
+            # Recreate vectorstore; the service writes it in CHROMA_BATCH_SIZE batches
+            self.vector_store = self.vector_store_service.create_from_documents(self.documents, embeddings)
+            self.retriever = VectorStoreRetriever(self.vector_store, self.documents)
 
             logging.info("Successfully rebuilt vectorstore")
             return True
@@ -1,8 +1,36 @@
 from .base import LLMBase
-from typing import Any, List, Dict, Optional
+from typing import Any, List, Dict, Iterator, Optional
 import litellm
 import asyncio
+import importlib.util
 import logging
+import threading
+import weakref
+import httpx
+
+# HTTP/2 multiplexing needs the optional h2 package; fall back to pooled HTTP/1.1 without it
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# One event loop per calling thread, shared by every provider and closed when the thread goes away
+_THREAD_LOOPS = threading.local()
+
+def _thread_loop() -> asyncio.AbstractEventLoop:
+    loop = getattr(_THREAD_LOOPS, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _THREAD_LOOPS.loop = loop
+        weakref.finalize(threading.current_thread(), loop.close)
+    return loop
+
+def _install_shared_http_client() -> None:
+    """
+    Give litellm one long-lived pooled client for all sync requests, so a new provider
+    (e.g. after a model or key change) reuses warm connections instead of new TCP/TLS handshakes.
+    """
+    if getattr(litellm, "client_session", None) is None:
+        litellm.client_session = httpx.Client(
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+        )
 
 class LiteLLMProvider(LLMBase):
     """
@@ -12,9 +40,27 @@ class LiteLLMProvider(LLMBase):
         self.api_key = api_key
         self.api_base = api_base
         self.model = model
+        _install_shared_http_client()
         logging.info(f"LiteLLMProvider initialized with model: {self.model}")
         logging.info(f"LiteLLMProvider initialized with api_base: {self.api_base}")
 
+    def _resolve(self, response: Any) -> Any:
+        """
+        Await coroutine responses on this thread's persistent loop rather than asyncio.run,
+        which would build and tear down a loop (and its connections) on every call.
+        """
+        if asyncio.iscoroutine(response):
+            response = _thread_loop().run_until_complete(response)
+        return response
+
+    @staticmethod
+    def _response_data(response: Any) -> Dict[str, Any]:
+        if isinstance(response, dict):
+            return response  # type: ignore
+        elif hasattr(response, 'json') and callable(response.json): # type: ignore
+            return response.json()  # type: ignore[attr-defined]
+        raise TypeError(f"Unexpected response type: {type(response)}")
+
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
         logging.info(f"LiteLLMProvider chat with model: {self.model}")
         response = litellm.completion(
@@ -25,40 +71,48 @@ class LiteLLMProvider(LLMBase):
             stream=False,
             **kwargs
         )
-        if asyncio.iscoroutine(response):
-            response = asyncio.run(response)
-        if isinstance(response, dict):
-            data = response  # type: ignore
-        elif hasattr(response, 'json') and callable(response.json): # type: ignore
-            data = response.json()  # type: ignore[attr-defined]
-        else:
-            raise TypeError(f"Unexpected response type: {type(response)}")
-        
+        data = self._response_data(self._resolve(response))
         logging.info(f"LiteLLMProvider chat response: {data}")
         return data['choices'][0]['message']['content']  # type: ignore
 
-    def completion(self, prompt: str, **kwargs) -> str:
+    @staticmethod
+    def _prompt_messages(prompt: str, system: Optional[str] = None) -> List[Dict[str, str]]:
+        # A fixed system message ahead of the prompt keeps a stable prefix for provider-side prompt caching
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        return messages
+
+    def completion(self, prompt: str, system: Optional[str] = None, **kwargs) -> str:
         logging.info(f"LiteLLMProvider completion with model: {self.model}")
         response = litellm.completion(
             model=self.model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=self._prompt_messages(prompt, system),
             api_key=self.api_key,
             api_base=self.api_base,
             stream=False,
             **kwargs
         )
-        if asyncio.iscoroutine(response):
-            response = asyncio.run(response)
-        if isinstance(response, dict):
-            data = response  # type: ignore
-        elif hasattr(response, 'json') and callable(response.json): # type: ignore
-            data = response.json()  # type: ignore[attr-defined]
-        else:
-            raise TypeError(f"Unexpected response type: {type(response)}")
-        
+        data = self._response_data(self._resolve(response))
         logging.info(f"LiteLLMProvider completion response: {data}")
         return data['choices'][0]['message']['content']  # type: ignore
 
+    def stream_completion(self, prompt: str, system: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """Yield the completion text incrementally as the provider streams it."""
+        logging.info(f"LiteLLMProvider stream_completion with model: {self.model}")
+        response = litellm.completion(
+            model=self.model,
+            messages=self._prompt_messages(prompt, system),
+            api_key=self.api_key,
+            api_base=self.api_base,
+            stream=True,
+            **kwargs
+        )
+        for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
     def embed(self, texts: List[str], **kwargs) -> List[List[float]]:
         response = litellm.embedding(
             model=self.model,
@@ -67,14 +121,7 @@ class LiteLLMProvider(LLMBase):
             api_base=self.api_base,
             **kwargs
         )
-        if asyncio.iscoroutine(response):
-            response = asyncio.run(response)
-        if isinstance(response, dict):
-            data = response  # type: ignore
-        elif hasattr(response, 'json') and callable(response.json):
-            data = response.json()  # type: ignore[attr-defined]
-        else:
-            raise TypeError(f"Unexpected response type: {type(response)}")
+        data = self._response_data(self._resolve(response))
         return [item['embedding'] for item in data['data']]  # type: ignore
 
     def tts(self, text: str, voice: Optional[str] = None, **kwargs) -> Any:
@@ -83,4 +130,4 @@ class LiteLLMProvider(LLMBase):
 
     def stt(self, audio: Any, **kwargs) -> str:
         # Placeholder: implement if LiteLLM supports STT for your providers
-        raise NotImplementedError("STT not implemented in LiteLLMProvider yet.") 
\ No newline at end of file
+        raise NotImplementedError("STT not implemented in LiteLLMProvider yet.")
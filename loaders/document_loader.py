@@ -1,13 +1,34 @@
 from typing import List, Any
-from langchain_community.document_loaders import TextLoader, Docx2txtLoader, UnstructuredPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.schema import Document
+import functools
+import importlib
+import io
 import logging
 
+# Loader class per file extension, imported on first use: each pulls in a heavy parser stack
+# (unstructured, docx2txt/lxml) that a session which never uploads that type shouldn't pay for
+LOADER_CLASS_NAMES = {
+    'pdf': 'UnstructuredPDFLoader',
+    'txt': 'TextLoader',
+    'docx': 'Docx2txtLoader',
+    'doc': 'Docx2txtLoader',
+}
+
+# Types decoded straight from the upload buffer, with no temp file round trip
+IN_MEMORY_TYPES = {'txt', 'docx'}
+
+@functools.lru_cache(maxsize=None)
+def _loader_class(name: str):
+    return getattr(importlib.import_module('langchain_community.document_loaders'), name)
+
 class DocumentLoader:
     """
     Handles loading documents from files and splitting them into chunks for processing.
     """
     def __init__(self, chunk_size: int = 300, chunk_overlap: int = 100):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
@@ -21,24 +42,45 @@ class DocumentLoader:
         """
         file_extension = original_filename.split('.')[-1].lower()
         try:
-            if file_extension == 'pdf':
-                loader = UnstructuredPDFLoader(file_path)
-            elif file_extension == 'txt':
-                loader = TextLoader(file_path, encoding='utf-8')
-            elif file_extension in ['docx', 'doc']:
-                loader = Docx2txtLoader(file_path)
-            else:
+            if file_extension not in LOADER_CLASS_NAMES:
                 raise ValueError(f"Unsupported file type: {file_extension}")
-            documents = loader.load()
-            # Add source metadata
-            for doc in documents:
-                doc.metadata['original_filename'] = original_filename
-                doc.metadata['file_type'] = file_extension
-            return documents
+            loader_class = _loader_class(LOADER_CLASS_NAMES[file_extension])
+            if file_extension == 'txt':
+                loader = loader_class(file_path, encoding='utf-8')
+            else:
+                loader = loader_class(file_path)
+            return self._add_source_metadata(loader.load(), original_filename, file_extension)
         except Exception as e:
             logging.error(f"Error loading document {original_filename}: {str(e)}")
             return []
 
+    def load_document_from_bytes(self, data: Any, original_filename: str) -> List[Any]:
+        """
+        Load a document directly from an in-memory buffer (bytes or memoryview).
+        Only types in IN_MEMORY_TYPES are supported; others need load_document with a path.
+        """
+        file_extension = original_filename.split('.')[-1].lower()
+        try:
+            if file_extension not in IN_MEMORY_TYPES:
+                raise ValueError(f"Unsupported in-memory file type: {file_extension}")
+            if file_extension == 'docx':
+                # docx2txt (what Docx2txtLoader wraps) opens the zip container from any file-like object
+                import docx2txt
+                text = docx2txt.process(io.BytesIO(data))
+            else:
+                text = str(data, 'utf-8')
+            documents = [Document(page_content=text, metadata={'source': original_filename})]
+            return self._add_source_metadata(documents, original_filename, file_extension)
+        except Exception as e:
+            logging.error(f"Error loading document {original_filename}: {str(e)}")
+            return []
+
+    def _add_source_metadata(self, documents: List[Any], original_filename: str, file_extension: str) -> List[Any]:
+        for doc in documents:
+            doc.metadata['original_filename'] = original_filename
+            doc.metadata['file_type'] = file_extension
+        return documents
+
     def split_documents(self, documents: List[Any]) -> List[Any]:
         """
         Split a list of langchain Document objects into chunks using the configured splitter.
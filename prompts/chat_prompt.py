@@ -1,7 +1,8 @@
+import string
+from typing import Dict, List
 from langchain.prompts import ChatPromptTemplate
 
-chat_prompt = ChatPromptTemplate.from_messages([
-    ("system", '''You are a helpful AI assistant that answers questions based on provided documents and your own general knowledge.
+CHAT_SYSTEM_PROMPT = '''You are a helpful AI assistant that answers questions based on provided documents and your own general knowledge.
 
 The user is asking about content from: {doc_context}
 
@@ -13,7 +14,33 @@ Rules:
 5. If asked about something not in the documents, you may answer from your own knowledge, but note when you are doing so.
 
 Available context from documents:
-{context}'''),
-    ("system", "Recent conversation context:\n{history_context}"),
-    ("user", "{user_message}")
-]) 
\ No newline at end of file
+{context}'''
+CHAT_HISTORY_PROMPT = "Recent conversation context:\n{history_context}"
+CHAT_USER_PROMPT = "{user_message}"
+
+chat_prompt = ChatPromptTemplate.from_messages([
+    ("system", CHAT_SYSTEM_PROMPT),
+    ("system", CHAT_HISTORY_PROMPT),
+    ("user", CHAT_USER_PROMPT)
+])
+
+def _compile(body: str) -> string.Template:
+    # Escape literal '$' first, then turn {name} placeholders into ${name}
+    return string.Template(body.replace('$', '$$').replace('{', '${'))
+
+# Precompiled once at import; render() skips LangChain's per-call template parsing and message objects
+_CHAT_TEMPLATES = (
+    ("system", _compile(CHAT_SYSTEM_PROMPT)),
+    ("system", _compile(CHAT_HISTORY_PROMPT)),
+    ("user", _compile(CHAT_USER_PROMPT)),
+)
+
+def render(doc_context: str, context: str, history_context: str, user_message: str) -> List[Dict[str, str]]:
+    """Render chat_prompt straight to OpenAI-style message dicts."""
+    values = {
+        "doc_context": doc_context,
+        "context": context,
+        "history_context": history_context,
+        "user_message": user_message
+    }
+    return [{"role": role, "content": template.substitute(values)} for role, template in _CHAT_TEMPLATES]
@@ -3,12 +3,13 @@ from langchain_chroma import Chroma
 from embeddings.embedding_model import EmbeddingModel
 
 PERSIST_DIR = "./chroma_db"
+TOP_K = 5
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python query_chromadb.py 'your query here'")
+        print("Usage: python query_chromadb.py 'your query here' ['another query' ...]")
         sys.exit(1)
-    query = sys.argv[1]
+    queries = sys.argv[1:]
 
     # Load embedding model (should match the one used to build the DB)
     embedder = EmbeddingModel().get()
@@ -19,15 +20,20 @@ if __name__ == "__main__":
     # Load Chroma vector store (use embedding_function for compatibility)
     vector_store = Chroma(persist_directory=PERSIST_DIR, embedding_function=embedder) # type: ignore
 
-    # Query
-    results = vector_store.similarity_search_with_score(
-        query, 
-        k=5, 
-        filter={"file_type": "pdf"}
+    # Embed every query in one batched call, then let Chroma answer them all in one query
+    vectors = embedder.embed_documents(queries)
+    results = vector_store._collection.query(
+        query_embeddings=vectors,
+        n_results=TOP_K,
+        where={"file_type": "pdf"},
+        include=["documents", "metadatas", "distances"]
     )
-    print(f"Top 5 results for query: '{query}'\n")
-    for i, (doc, score) in enumerate(results):
-        print(f"Result {i+1} (Score: {score:.4f}):")
-        print(f"Content: {doc.page_content[:200]}...")
-        print(f"Metadata: {doc.metadata}")
-        print("-"*60) 
\ No newline at end of file
+    for query, documents, metadatas, distances in zip(
+        queries, results["documents"], results["metadatas"], results["distances"]
+    ):
+        print(f"Top {TOP_K} results for query: '{query}'\n")
+        for i, (content, metadata, score) in enumerate(zip(documents, metadatas, distances)):
+            print(f"Result {i+1} (Score: {score:.4f}):")
+            print(f"Content: {content[:200]}...")
+            print(f"Metadata: {metadata}")
+            print("-"*60)
@@ -0,0 +1,15 @@
+import numpy as np
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows into a C-contiguous float32 matrix, so scoring a query is one matmul."""
+    matrix = np.array(matrix, dtype=np.float32, order='C')
+    matrix /= np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+    return matrix
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first; argpartition avoids sorting the whole array."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
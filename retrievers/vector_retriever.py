@@ -1,40 +1,140 @@
 import logging
 import random
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterator, Optional
+import numpy as np
+from vector_stores.chroma_store import relevance_from_distance
+from services.semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+# Cosine similarity at which an earlier query's search results are reused
+QUERY_CACHE_THRESHOLD = 0.95
+# Seconds a cached search result stays valid, and results kept per search scope
+QUERY_CACHE_TTL = 600
+QUERY_CACHE_MAX_ENTRIES = 256
+# Topic embeddings kept for repeat get_context_by_topics calls
+TOPIC_CACHE_SIZE = 256
+# Chunks fetched per Chroma get() page by iter_all_chunks
+CHUNK_PAGE_SIZE = 512
 
 class VectorStoreRetriever:
     """
     Handles retrieval operations from a vector store, including similarity search and topic-based context retrieval.
     """
+    __slots__ = (
+        'vector_store', '_documents', '_rng', '_lengths', '_file_ids', '_context_indices', '_query_caches', '_filter_cache',
+        '_topic_vectors', '_topic_vectors_lock'
+    )
+
     def __init__(self, vector_store, documents: Optional[List[Any]] = None):
         self.vector_store = vector_store
+        # Instance-local RNG: picking one index per call is cheaper than a numpy Generator draw
+        self._rng = random.Random()
         self.documents = documents or []
+        # One semantic cache per (k, document filter), so results are only reused for the same search scope
+        self._query_caches: Dict[tuple, SemanticCache] = {}
+        # Chroma where-filters per sorted document selection, built once and reused across calls
+        self._filter_cache: Dict[tuple, Dict[str, Any]] = {}
+        # LRU of topic -> embedding, so repeated topics skip the embedding call entirely
+        self._topic_vectors: OrderedDict = OrderedDict()
+        self._topic_vectors_lock = threading.Lock()
+
+    def _query_cache(self, k: int, selected_documents: Optional[list]) -> Optional[SemanticCache]:
+        embeddings = getattr(self.vector_store, 'embeddings', None)
+        if embeddings is None:
+            return None
+        scope = frozenset(selected_documents) if selected_documents and 'all' not in selected_documents else None
+        cache = self._query_caches.get((k, scope))
+        if cache is None:
+            cache = self._query_caches[(k, scope)] = SemanticCache(
+                embeddings, threshold=QUERY_CACHE_THRESHOLD, ttl=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_MAX_ENTRIES
+            )
+        return cache
+
+    @property
+    def vectorstore(self):
+        """Alias of vector_store for callers using the older attribute name."""
+        return self.vector_store
+
+    @property
+    def documents(self) -> List[Any]:
+        return self._documents
+
+    @documents.setter
+    def documents(self, documents: List[Any]) -> None:
+        self._documents = documents
+        self._build_document_index()
+
+    def _build_document_index(self) -> None:
+        # Column layout for get_random_context: content lengths and file ids as numpy arrays,
+        # so filtering is a vectorized mask instead of a Python loop over documents
+        docs = self._documents
+        self._lengths = np.fromiter((len(doc.page_content) for doc in docs), dtype=np.int64, count=len(docs))
+        file_ids = np.empty(len(docs), dtype=object)
+        for i, doc in enumerate(docs):
+            meta = doc.metadata
+            # Chunks ingested before _file_id was stamped fall back to the original lookup chain
+            file_ids[i] = meta.get('_file_id') or meta.get('file_hash') or meta.get('source_file') or meta.get('original_filename') or 'Unknown'
+        self._file_ids = file_ids
+        # (min_length, sorted selection) -> candidate indices; valid until the columns are rebuilt
+        self._context_indices: Dict[tuple, np.ndarray] = {}
+
+    def _file_filter(self, selected_documents: Optional[list]) -> Optional[Dict[str, Any]]:
+        if not selected_documents or 'all' in selected_documents:
+            return None
+        key = tuple(sorted(selected_documents))
+        where = self._filter_cache.get(key)
+        if where is None:
+            # Chroma supports $in for filtering multiple values
+            where = self._filter_cache[key] = {"file_hash": {"$in": list(key)}}
+        return where
+
+    def clear_query_cache(self) -> None:
+        """Drop cached search results, e.g. after documents were removed from the store."""
+        self._query_caches.clear()
 
     def similarity_search(self, query: str, k: int = 5, selected_documents: Optional[list] = None) -> List[Dict[str, Any]]:
         """
         Search the vector store for relevant information using similarity search with scores.
-        Optionally filter by selected_documents (list of file_hash values).
+        Optionally filter by selected_documents (list of file_hash values). Results for a
+        near-identical earlier query in the same scope are served from the semantic cache.
         """
         if not self.vector_store:
             return []
+        cache = self._query_cache(k, selected_documents)
+        if cache is None:
+            return self._search(query, k, selected_documents)
+        try:
+            embedding = self.vector_store.embeddings.embed_query(query)
+        except Exception as e:
+            logger.warning("Query embedding failed, searching without the cache: %s", e)
+            embedding = None
+        if not embedding:
+            return self._search(query, k, selected_documents)
+        # The same vector keys the cache and runs the search, so an uncached query is embedded once
+        return cache.get_or_compute(query, lambda: self._search(query, k, selected_documents, embedding), embedding=embedding)
+
+    def _search(self, query: str, k: int, selected_documents: Optional[list], embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
         try:
-            logging.info(f"Searching knowledge base with query: {query}")
-            filter_dict = None
-            if selected_documents and 'all' not in selected_documents:
-                # Chroma supports $in for filtering multiple values
-                filter_dict = {"file_hash": {"$in": selected_documents}}
-            results = self.vector_store.similarity_search_with_score(query, k=k, filter=filter_dict)
-            formatted_results = []
-            for doc, score in results:
-                formatted_results.append({
-                    'content': doc.page_content,
-                    'metadata': doc.metadata,
-                    'relevance_score': score
-                })
-            logging.info(f"Formatted results: {formatted_results}")
+            logger.info("Searching knowledge base with query: %.80s", query)
+            filter_dict = self._file_filter(selected_documents)
+            if embedding is not None:
+                results = self.vector_store.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=filter_dict)
+            else:
+                results = self.vector_store.similarity_search_with_score(query, k=k, filter=filter_dict)
+            vector_store = self.vector_store
+            formatted_results = [
+                {'content': doc.page_content, 'metadata': doc.metadata, 'relevance_score': relevance_from_distance(vector_store, score)}
+                for doc, score in results
+            ]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Formatted %d results (top=%.3f)", len(formatted_results),
+                             formatted_results[0]['relevance_score'] if formatted_results else 0.0)
             return formatted_results
         except Exception as e:
-            logging.error(f"Error searching knowledge base: {str(e)}")
+            logger.error("Error searching knowledge base: %s", e)
             return []
 
     def get_random_context(self, min_length: int = 200, selected_documents: Optional[list] = None) -> Optional[str]:
@@ -42,38 +142,82 @@ class VectorStoreRetriever:
         Get a random context from the documents for question generation.
         If selected_documents is provided, only use those documents.
         """
-        docs = self.documents
-        if selected_documents and 'all' not in selected_documents:
-            filtered_docs = []
-            for doc in docs:
-                meta = getattr(doc, 'metadata', {})
-                file_id = meta.get('file_hash') or meta.get('source_file') or meta.get('original_filename') or 'Unknown'
-                if file_id in selected_documents:
-                    filtered_docs.append(doc)
-            docs = filtered_docs
-        if not docs:
-            return None
-        suitable_docs = [doc for doc in docs if len(doc.page_content) >= min_length]
-        if not suitable_docs:
-            suitable_docs = docs  # Fallback to any document
-        if suitable_docs:
-            selected_doc = random.choice(suitable_docs)
-            return selected_doc.page_content
+        # The document list may have been extended in place since the columns were built
+        if self._lengths.size != len(self._documents):
+            self._build_document_index()
+        selection = tuple(sorted(selected_documents)) if selected_documents and 'all' not in selected_documents else None
+        # Question generation calls this repeatedly with the same arguments; scan the columns once per key
+        idxs = self._context_indices.get((min_length, selection))
+        if idxs is None:
+            if selection is not None:
+                candidates = np.isin(self._file_ids, list(selection))
+            else:
+                candidates = np.ones(self._lengths.size, dtype=bool)
+            idxs = np.flatnonzero(candidates & (self._lengths >= min_length))
+            if not idxs.size:
+                idxs = np.flatnonzero(candidates)  # Fallback to any document
+            self._context_indices[(min_length, selection)] = idxs
+        if idxs.size:
+            return self._documents[int(idxs[self._rng.randrange(idxs.size)])].page_content
         return None
 
     def get_context_by_topic(self, topic: str, k: int = 3) -> List[str]:
         """
         Get context related to a specific topic using similarity search.
         """
-        if not self.vector_store:
-            return []
+        return self.get_context_by_topics([topic], k=k)[0]
+
+    def _topic_embeddings(self, topics: List[str]) -> List[Optional[List[float]]]:
+        """Embedding per topic, or None for topics whose embedding failed; only real vectors are cached."""
+        with self._topic_vectors_lock:
+            missing = list(dict.fromkeys(t for t in topics if t not in self._topic_vectors))
+        if missing:
+            # One batched embedding call for every topic not seen recently
+            vectors = self.vector_store.embeddings.embed_documents(missing)
+            with self._topic_vectors_lock:
+                for topic, vector in zip(missing, vectors):
+                    # A failed call yields empty vectors; caching those would poison the topic until eviction
+                    if vector is not None and len(vector):
+                        self._topic_vectors[topic] = vector
+        with self._topic_vectors_lock:
+            result = []
+            for topic in topics:
+                vector = self._topic_vectors.get(topic)
+                if vector is not None:
+                    self._topic_vectors.move_to_end(topic)
+                result.append(vector)
+            while len(self._topic_vectors) > TOPIC_CACHE_SIZE:
+                self._topic_vectors.popitem(last=False)
+        return result
+
+    def get_context_by_topics(self, topics: List[str], k: int = 3) -> List[List[str]]:
+        """
+        Get context for several topics at once: the topics are embedded in one batched call
+        and answered by a single multi-vector Chroma query. Returns one list per topic; topics
+        whose embedding failed get an empty list.
+        """
+        if not self.vector_store or not topics:
+            return [[] for _ in topics]
         try:
-            logging.info(f"Getting context by topic: {topic}")
-            results = self.vector_store.similarity_search(topic, k=k)
-            return [doc.page_content for doc in results]
+            logger.info("Getting context for %d topic(s)", len(topics))
+            vectors = self._topic_embeddings(topics)
+            embedded = [i for i, vector in enumerate(vectors) if vector is not None]
+            if len(embedded) < len(topics):
+                logger.warning("Embedding failed for %d topic(s); skipping them", len(topics) - len(embedded))
+            contexts: List[List[str]] = [[] for _ in topics]
+            if not embedded:
+                return contexts
+            results = self.vector_store._collection.query(
+                query_embeddings=[vectors[i] for i in embedded],
+                n_results=k,
+                include=["documents"]
+            )
+            for i, documents in zip(embedded, results["documents"]):
+                contexts[i] = list(documents)
+            return contexts
         except Exception as e:
-            logging.error(f"Error getting context by topic: {str(e)}")
-            return []
+            logger.error("Error getting context by topic: %s", e)
+            return [[] for _ in topics]
 
     def get_all_chunks(self, selected_documents: Optional[list] = None) -> List[Dict[str, Any]]:
         """
@@ -82,19 +226,34 @@ class VectorStoreRetriever:
         if not self.vector_store:
             return []
         try:
-            where = None
-            if selected_documents and 'all' not in selected_documents:
-                where = {"file_hash": {"$in": selected_documents}}
+            where = self._file_filter(selected_documents)
             # Chroma get() returns a dict with 'documents' and 'metadatas'
             result = self.vector_store.get(where=where, include=["documents", "metadatas"])
-            chunks = []
-            if result and 'documents' in result and 'metadatas' in result:
-                for content, meta in zip(result['documents'], result['metadatas']):
-                    chunks.append({
-                        'content': content,
-                        'metadata': meta
-                    })
-            return chunks
+            if not (result and 'documents' in result and 'metadatas' in result):
+                return []
+            return [{'content': content, 'metadata': meta} for content, meta in zip(result['documents'], result['metadatas'])]
         except Exception as e:
-            logging.error(f"Error fetching all chunks: {str(e)}")
-            return [] 
\ No newline at end of file
+            logger.error("Error fetching all chunks: %s", e)
+            return []
+
+    def iter_all_chunks(self, selected_documents: Optional[list] = None, batch_size: int = CHUNK_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Stream chunks from the vector store one page of batch_size at a time, so callers can
+        consume them without the whole collection being materialized in one list.
+        """
+        if not self.vector_store:
+            return
+        where = self._file_filter(selected_documents)
+        offset = 0
+        while True:
+            try:
+                page = self.vector_store.get(where=where, limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            except Exception as e:
+                logger.error("Error fetching chunks: %s", e)
+                return
+            documents = (page.get('documents') or []) if page else []
+            for content, meta in zip(documents, page.get('metadatas') or []):
+                yield {'content': content, 'metadata': meta}
+            if len(documents) < batch_size:
+                return
+            offset += batch_size
@@ -1,8 +1,22 @@
 import logging
+import os
+import threading
+from collections import OrderedDict
 from llm.litellm_provider import LiteLLMProvider
 from agents.quiz_agent import QuizAgent
 from agents.chat_agent import ChatAgent
+from services.semantic_cache import SemanticCache
 
+# Process-wide LRU of (llm_provider, semantic_cache) per provider and embedding config, shared
+# by every session on this worker. Both are stateless per user; QuizAgent and ChatAgent are built
+# per session around that session's own retriever and are never cached here.
+AGENT_CACHE_SIZE = 8
+# Cached quizzes expire after this many seconds (SEMANTIC_CACHE_TTL overrides), so a selection's quiz is not replayed forever
+SEMANTIC_CACHE_TTL = 24 * 60 * 60
+# Quiz responses kept per cache; the oldest are evicted first
+SEMANTIC_CACHE_MAX_ENTRIES = 512
+_AGENT_CACHE: OrderedDict = OrderedDict()
+_AGENT_CACHE_LOCK = threading.Lock()
 
 def initialize_llm_provider(session_state):
     """
@@ -16,6 +30,45 @@ def initialize_llm_provider(session_state):
     return LiteLLMProvider(api_key=api_key, api_base=base_url, model=model_with_prefix)
 
 
+def create_semantic_cache(km):
+    """
+    Build the quiz response cache on the knowledge base's embedding model.
+    Set SEMANTIC_CACHE_DB to a file path to persist it; returns None if embeddings are unavailable.
+    """
+    embeddings = km.embedder.get() if km and km.embedder else None
+    if not embeddings:
+        return None
+    ttl = float(os.getenv("SEMANTIC_CACHE_TTL", SEMANTIC_CACHE_TTL))
+    return SemanticCache(embeddings, path=os.getenv("SEMANTIC_CACHE_DB"), ttl=ttl, max_entries=SEMANTIC_CACHE_MAX_ENTRIES)
+
+
+def _shared_agent_parts(session_state, km):
+    """Return the cached provider and semantic cache for this config, building them on a miss."""
+    embedder = km.embedder if km else None
+    shared_key = (
+        session_state.get("llm_provider_choice", "openai"),
+        session_state.get("selected_model", "gpt-4o-mini"),
+        session_state.get("openai_api_key", ""),
+        session_state.get("openai_base_url", ""),
+        getattr(embedder, "model_name", None),
+        getattr(embedder, "api_base", None)
+    )
+    with _AGENT_CACHE_LOCK:
+        cached = _AGENT_CACHE.get(shared_key)
+        if cached is not None:
+            _AGENT_CACHE.move_to_end(shared_key)
+            return cached
+    parts = (initialize_llm_provider(session_state), create_semantic_cache(km))
+    if parts[1] is None:
+        # Embeddings were unavailable; retry on the next session rather than caching the gap
+        return parts
+    with _AGENT_CACHE_LOCK:
+        _AGENT_CACHE[shared_key] = parts
+        if len(_AGENT_CACHE) > AGENT_CACHE_SIZE:
+            _AGENT_CACHE.popitem(last=False)
+    return parts
+
+
 def initialize_agents(session_state, km):
     """
     Initialize QuizAgent and ChatAgent using the retriever from KnowledgeManager and the LLM provider.
@@ -24,32 +77,28 @@ def initialize_agents(session_state, km):
     """
     import logging  # Ensure logging is imported
     try:
-        # Gather current config
-        provider = session_state.get("llm_provider_choice", "openai")
-        model = session_state.get("selected_model", "gpt-4o-mini")
-        api_key = session_state.get("openai_api_key", "")
-        base_url = session_state.get("openai_base_url", "")
-        retriever_id = id(km.retriever) if km and km.retriever else None
-        current_config = {
-            "provider": provider,
-            "model": model,
-            "api_key": api_key,
-            "base_url": base_url,
-            "retriever_id": retriever_id
-        }
-        last_config = getattr(session_state, "_last_agent_config", None)
-        if last_config == current_config and session_state.get("quiz_bot") and session_state.get("chat_bot"):
+        # Gather current config as one flat tuple; comparing it is cheaper than a dict compare
+        ss = session_state
+        retriever = km.retriever if km else None
+        agent_key = (
+            ss.get("llm_provider_choice", "openai"),
+            ss.get("selected_model", "gpt-4o-mini"),
+            ss.get("openai_api_key", ""),
+            ss.get("openai_base_url", ""),
+            id(retriever) if retriever else None
+        )
+        if getattr(ss, "_last_agent_key", None) == agent_key and ss.get("quiz_bot") and ss.get("chat_bot"):
             # No change, skip reinitialization
             logging.info("Agent config unchanged, skipping reinitialization.")
             return
-        # Save new config
-        session_state._last_agent_config = current_config
-        llm_provider = initialize_llm_provider(session_state)
-        session_state.llm_provider_obj = llm_provider
+        ss._last_agent_key = agent_key
         if km.retriever:
-            session_state.quiz_bot = QuizAgent(km.retriever, llm_provider)
+            llm_provider, semantic_cache = _shared_agent_parts(session_state, km)
+            session_state.llm_provider_obj = llm_provider
+            session_state.quiz_bot = QuizAgent(km.retriever, llm_provider, semantic_cache=semantic_cache)
             session_state.chat_bot = ChatAgent(km.retriever, llm_provider)
         else:
+            session_state.llm_provider_obj = initialize_llm_provider(session_state)
             logging.warning("KnowledgeManager retriever is not available. Agents not initialized.")
     except Exception as e:
         logging.error(f"Failed to initialize agents: {e}")
@@ -1,41 +1,146 @@
+import logging
+import os
+import shutil
 import tempfile
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from loaders.document_loader import DocumentLoader
+from typing import Any, Dict, List, Optional
+from langchain.schema import Document
+from loaders.document_loader import DocumentLoader, IN_MEMORY_TYPES
+
+# Temp files for path-based loaders go to tmpfs when available, so the write/read round-trip stays in RAM
+_SHM_DIR = '/dev/shm'
+UPLOAD_TEMP_DIR = _SHM_DIR if os.path.isdir(_SHM_DIR) and os.access(_SHM_DIR, os.W_OK) else None
+
+# Split results kept for re-uploads, keyed by (file hash, chunk size, chunk overlap); shared by all sessions
+SPLIT_CACHE_SIZE = 16
+_SPLIT_CACHE: OrderedDict = OrderedDict()
+_SPLIT_CACHE_LOCK = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+def file_group_id(metadata: Any) -> str:
+    """
+    Identifier a chunk is grouped and removed under: its file_hash, else source_file, else
+    original_filename (chunks from process_text_content carry no hash), else 'Unknown'.
+    """
+    if not isinstance(metadata, dict):
+        return 'Unknown'
+    return metadata.get('file_hash') or metadata.get('source_file') or metadata.get('original_filename') or 'Unknown'
+
+def _write_temp_file(buffer, suffix: str) -> str:
+    """
+    Write the upload buffer view (no copy) to a temp file and return its path. tmpfs is used only
+    while it has room for the file (Docker caps /dev/shm at 64 MB by default); a failed tmpfs write
+    is retried in the regular temp directory.
+    """
+    temp_dirs = [None]
+    if UPLOAD_TEMP_DIR and shutil.disk_usage(UPLOAD_TEMP_DIR).free > len(buffer):
+        temp_dirs.insert(0, UPLOAD_TEMP_DIR)
+    for temp_dir in temp_dirs:
+        tmp_file_path = None
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=temp_dir) as tmp_file:
+                tmp_file_path = tmp_file.name
+                tmp_file.write(memoryview(buffer))
+            return tmp_file_path
+        except OSError:
+            if tmp_file_path:
+                try:
+                    os.unlink(tmp_file_path)
+                except FileNotFoundError:
+                    pass
+            if temp_dir is None:
+                raise
+            logger.warning("Could not write upload to %s; falling back to the default temp directory", temp_dir)
+
+def _cached_split(key) -> Optional[List[Any]]:
+    """Fresh Document copies of a cached split, or None on a miss; callers stamp their own metadata."""
+    if key is None:
+        return None
+    with _SPLIT_CACHE_LOCK:
+        cached = _SPLIT_CACHE.get(key)
+        if cached is None:
+            return None
+        _SPLIT_CACHE.move_to_end(key)
+    return [Document(page_content=content, metadata=dict(metadata)) for content, metadata in cached]
+
+def _store_split(key, texts: List[Any]) -> None:
+    if key is None:
+        return
+    # Snapshot before file-level metadata is stamped, so a later upload of the same bytes starts clean
+    snapshot = [(text.page_content, dict(text.metadata)) for text in texts]
+    with _SPLIT_CACHE_LOCK:
+        _SPLIT_CACHE[key] = snapshot
+        if len(_SPLIT_CACHE) > SPLIT_CACHE_SIZE:
+            _SPLIT_CACHE.popitem(last=False)
 
 class DocumentProcessor:
     def __init__(self):
         self.loader = DocumentLoader()
 
-    def process_uploaded_file(self, uploaded_file):
+    def process_uploaded_file(self, uploaded_file, extra_metadata: Optional[Dict[str, Any]] = None):
+        """
+        Load and split an uploaded file, stamping file-level metadata (plus any
+        extra_metadata, e.g. the file hash) onto every chunk in a single pass.
+        A re-upload of a file with a known hash reuses its cached split instead of re-parsing.
+        """
+        # Fetch the upload buffer once; its length is the file size stamped on every chunk
+        buffer = uploaded_file.getbuffer()
+        file_size = len(buffer)
+        file_hash = (extra_metadata or {}).get('file_hash')
+        cache_key = (file_hash, self.loader.chunk_size, self.loader.chunk_overlap) if file_hash else None
+        texts = _cached_split(cache_key)
+        if texts is None:
+            texts = self._load_and_split(uploaded_file, buffer)
+            if not texts:
+                return []
+            _store_split(cache_key, texts)
+        else:
+            logger.info("[Splitter] %s: Reused %d cached chunk(s)", uploaded_file.name, len(texts))
+        current_time = datetime.now().isoformat()
+        # File-level fields are identical for every chunk, so build them once
+        file_metadata = {
+            'source_file': uploaded_file.name,
+            'processed_date': current_time,
+            'file_size': file_size,
+            **(extra_metadata or {})
+        }
+        # Resolved once here so retrievers filter on a single key instead of a fallback chain
+        file_metadata['_file_id'] = file_metadata.get('file_hash') or uploaded_file.name
+        # One C-level dict.update per chunk; a thread pool would only contend on the GIL here
+        for i, text in enumerate(texts):
+            text.metadata.update(file_metadata, chunk_index=i)
+        return texts
+
+    def _load_and_split(self, uploaded_file, buffer):
         file_extension = uploaded_file.name.split('.')[-1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as tmp_file:
-            tmp_file.write(uploaded_file.getbuffer())
-            tmp_file_path = tmp_file.name
+        tmp_file_path = None
         try:
-            documents = self.loader.load_document(tmp_file_path, uploaded_file.name)
-            import logging
-            logging.info(f"[Loader] {uploaded_file.name}: Loaded {len(documents)} document(s) (should match PDF pages)")
-            if documents:
-                texts = self.loader.split_documents(documents)
-                logging.info(f"[Splitter] {uploaded_file.name}: Split into {len(texts)} chunk(s)")
+            if file_extension.lower() in IN_MEMORY_TYPES:
+                documents = self.loader.load_document_from_bytes(buffer, uploaded_file.name)
+            else:
+                # Path-based loaders (PDF) still need the bytes on disk
+                tmp_file_path = _write_temp_file(buffer, f".{file_extension}")
+                documents = self.loader.load_document(tmp_file_path, uploaded_file.name)
+            logger.info("[Loader] %s: Loaded %d document(s) (should match PDF pages)", uploaded_file.name, len(documents))
+            if not documents:
+                return []
+            texts = self.loader.split_documents(documents)
+            logger.info("[Splitter] %s: Split into %d chunk(s)", uploaded_file.name, len(texts))
+            if logger.isEnabledFor(logging.DEBUG):
                 for i, chunk in enumerate(texts):
-                    logging.info(f"[Splitter] Chunk {i}: {chunk.page_content[:80]}... | Metadata: {chunk.metadata}")
-                current_time = datetime.now().isoformat()
-                for text in texts:
-                    text.metadata.update({
-                        'source_file': uploaded_file.name,
-                        'processed_date': current_time,
-                        'file_size': len(uploaded_file.getbuffer())
-                    })
-                return texts
-            return []
+                    logger.debug("[Splitter] Chunk %d: %.80s... | Metadata: %s", i, chunk.page_content, chunk.metadata)
+            return texts
         finally:
-            import os
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
+            if tmp_file_path:
+                try:
+                    os.unlink(tmp_file_path)
+                except FileNotFoundError:
+                    pass
 
     def process_text_content(self, text_content: str, source_name: str = "Sample Content"):
-        from langchain.schema import Document
         document = Document(page_content=text_content, metadata={"source": source_name})
         texts = self.loader.split_documents([document])
         return texts 
\ No newline at end of file
@@ -0,0 +1,181 @@
+import bisect
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+# Rows preallocated for cached embeddings; the matrix doubles when full
+INITIAL_CAPACITY = 1024
+
+class SemanticCache:
+    """
+    Caches LLM responses keyed by the embedding of their request text. A lookup whose cosine
+    similarity to a stored key reaches the threshold returns the stored response instead of
+    calling the LLM. An optional discriminator (e.g. a tuple of request parameters) must match
+    exactly: only entries stored under the same discriminator are compared. Entries older than
+    ttl seconds are dropped, and past max_entries the oldest go first. Optionally persisted
+    to a SQLite file so hits survive restarts; in-memory caches may hold any response object.
+    """
+    def __init__(self, embeddings: Any, threshold: float = DEFAULT_SIMILARITY_THRESHOLD, path: Optional[str] = None, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Normalized key embeddings, one contiguous row each; only the first _size rows are live
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._responses: List[Any] = []
+        # Insertion time per row; rows are appended in time order, so expired rows are a prefix
+        self._times: List[float] = []
+        # Row indices per discriminator (by repr, so it round-trips through SQLite)
+        self._rows: Dict[str, List[int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS semantic_cache (key TEXT, embedding BLOB, response TEXT, scope TEXT, created REAL)")
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(semantic_cache)")]
+            if "scope" not in columns:
+                # Caches written before discriminators existed; their rows load under the default scope
+                self._conn.execute("ALTER TABLE semantic_cache ADD COLUMN scope TEXT")
+            if "created" not in columns:
+                # Rows written before expiry existed count as oldest, so a ttl drops them first
+                self._conn.execute("ALTER TABLE semantic_cache ADD COLUMN created REAL")
+            rows = self._conn.execute("SELECT embedding, response, scope, created FROM semantic_cache ORDER BY rowid")
+            for embedding, response, scope, created in rows:
+                if self._append(np.frombuffer(embedding, dtype=np.float32)):
+                    self._add_row(scope or repr(None), response, created or 0.0)
+            with self._lock:
+                self._evict(time.time())
+            logging.info(f"Loaded {len(self._responses)} semantic cache entries from {path}")
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def _embed(self, text: str, embedding: Any = None) -> Optional[np.ndarray]:
+        if embedding is None:
+            embedding = self.embeddings.embed_query(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.ndim != 1 or not vector.size or norm == 0:
+            return None
+        # Stored normalized, so a dot product is the cosine similarity
+        return vector / norm
+
+    def _append(self, vector: np.ndarray) -> bool:
+        """Copy a normalized vector into the next free row, doubling the matrix when it is full."""
+        if self._matrix is None:
+            self._matrix = np.empty((INITIAL_CAPACITY, vector.shape[0]), dtype=np.float32)
+        elif vector.shape[0] != self._matrix.shape[1]:
+            return False
+        elif self._size == self._matrix.shape[0]:
+            grown = np.empty((self._size * 2, self._matrix.shape[1]), dtype=np.float32)
+            grown[:self._size] = self._matrix
+            self._matrix = grown
+        self._matrix[self._size] = vector
+        self._size += 1
+        return True
+
+    def _add_row(self, scope: str, response: Any, created: float) -> None:
+        self._rows.setdefault(scope, []).append(len(self._responses))
+        self._responses.append(response)
+        self._times.append(created)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows and, past max_entries, the oldest ones. Callers hold the lock."""
+        drop = 0
+        if self.ttl is not None:
+            drop = bisect.bisect_left(self._times, now - self.ttl)
+        if self.max_entries is not None:
+            drop = max(drop, self._size - self.max_entries)
+        if drop <= 0:
+            return
+        cutoff = self._times[drop - 1]
+        live = self._size - drop
+        self._matrix[:live] = self._matrix[drop:self._size]
+        self._size = live
+        del self._responses[:drop]
+        del self._times[:drop]
+        rows = ((scope, [i - drop for i in indices if i >= drop]) for scope, indices in self._rows.items())
+        self._rows = {scope: indices for scope, indices in rows if indices}
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM semantic_cache WHERE created IS NULL OR created <= ?", (cutoff,))
+            self._conn.commit()
+
+    def _lookup(self, vector: np.ndarray, scope: str) -> Optional[Any]:
+        with self._lock:
+            self._evict(time.time())
+            rows = self._rows.get(scope)
+            if not rows or self._matrix.shape[1] != vector.shape[0]:
+                self.misses += 1
+                return None
+            # One GEMV over the scope's rows; both sides are unit length, so this is cosine similarity.
+            # A single-scope cache scores the contiguous live slice without gathering rows
+            if len(rows) == self._size:
+                scores = self._matrix[:self._size] @ vector
+            else:
+                scores = self._matrix[rows] @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                self.hits += 1
+                return self._responses[rows[best]]
+            self.misses += 1
+        return None
+
+    def _store(self, text: str, vector: np.ndarray, response: Any, scope: str) -> None:
+        with self._lock:
+            if not self._append(vector):
+                return
+            now = time.time()
+            self._add_row(scope, response, now)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO semantic_cache (key, embedding, response, scope, created) VALUES (?, ?, ?, ?, ?)",
+                    (text, vector.tobytes(), response, scope, now)
+                )
+                self._conn.commit()
+            self._evict(now)
+
+    def lookup(self, text: str, discriminator: Any = None) -> Optional[Any]:
+        """Return the cached response for a semantically similar text under the same discriminator, if any."""
+        try:
+            vector = self._embed(text)
+        except Exception as e:
+            logging.warning(f"Semantic cache embedding failed, bypassing cache: {e}")
+            return None
+        return self._lookup(vector, repr(discriminator)) if vector is not None else None
+
+    def store(self, text: str, response: Any, discriminator: Any = None) -> None:
+        """Cache a response produced outside get_or_compute (e.g. assembled from a stream)."""
+        try:
+            vector = self._embed(text)
+        except Exception as e:
+            logging.warning(f"Semantic cache embedding failed, not storing: {e}")
+            return
+        if vector is not None and response:
+            self._store(text, vector, response, repr(discriminator))
+
+    def get_or_compute(self, text: str, compute: Callable[[], Any], discriminator: Any = None, embedding: Any = None) -> Any:
+        """
+        Return a cached response for a semantically similar text (same discriminator), or compute and store one.
+        Pass embedding when the caller already embedded text, so it is not embedded again.
+        """
+        try:
+            vector = self._embed(text, embedding)
+        except Exception as e:
+            logging.warning(f"Semantic cache embedding failed, bypassing cache: {e}")
+            vector = None
+        if vector is not None:
+            cached = self._lookup(vector, repr(discriminator))
+            if cached is not None:
+                logging.info("Semantic cache hit")
+                return cached
+        response = compute()
+        if vector is not None and response:
+            self._store(text, vector, response, repr(discriminator))
+        return response
@@ -1,23 +1,59 @@
-from vector_stores.chroma_store import ChromaStoreManager
+import os
+from vector_stores.chroma_store import CHROMA_BATCH_SIZE, ChromaStoreManager
+from services.document_processor import file_group_id
+
+# Opt in to the in-memory faiss backend, which skips Chroma's per-insert overhead for small corpora
+FAISS_STORE = os.getenv("FAISS_STORE", "").lower() in ("1", "true", "yes")
 
 class VectorStoreService:
     def __init__(self, persist_directory: str = "./chroma_db"):
-        self.manager = ChromaStoreManager(persist_directory)
+        if FAISS_STORE:
+            from vector_stores.faiss_store import FaissStoreManager
+            self.manager = FaissStoreManager(persist_directory)
+        else:
+            self.manager = ChromaStoreManager(persist_directory)
         self.vector_store = None
 
     def create_from_documents(self, texts, embeddings):
-        self.vector_store = self.manager.create_from_documents(texts, embeddings)
+        # Seed the collection with the first batch, then stream in the rest
+        self.vector_store = self.manager.create_from_documents(texts[:CHROMA_BATCH_SIZE], embeddings)
+        self._add_batches(texts[CHROMA_BATCH_SIZE:])
+        self.manager.persist()
         return self.vector_store
 
     def add_documents(self, texts):
-        self.manager.add_documents(texts)
+        self._add_batches(texts)
+        self.manager.persist()
+
+    def _add_batches(self, texts):
+        for start in range(0, len(texts), CHROMA_BATCH_SIZE):
+            self.manager.add_documents(texts[start:start + CHROMA_BATCH_SIZE])
+
+    def add_embedded_documents(self, texts, vectors, ids, embeddings, create=False):
+        self.vector_store = self.manager.add_embeddings(texts, vectors, ids, embeddings, create=create)
+        return self.vector_store
 
     def load_existing(self, embeddings):
         self.vector_store = self.manager.load_existing(embeddings)
         return self.vector_store
 
+    def delete_by_file_id(self, file_id) -> int:
+        """
+        Delete every chunk grouped under file_id by file_group_id (file_hash, else source_file,
+        else original_filename) and return how many were deleted.
+        """
+        vector_store = self.manager.vector_store
+        if vector_store is None:
+            return 0
+        # The store can't express the fallback chain, so fetch candidates on any of the keys and filter exactly
+        where = {"$or": [{"file_hash": file_id}, {"source_file": file_id}, {"original_filename": file_id}]}
+        result = vector_store.get(where=where, include=["metadatas"])
+        ids = [chunk_id for chunk_id, metadata in zip(result['ids'], result['metadatas']) if file_group_id(metadata) == file_id]
+        self.manager.delete_ids(ids)
+        return len(ids)
+
     def persist(self):
         self.manager.persist()
 
     def clear_all_data(self):
-        self.manager.clear_all_data() 
\ No newline at end of file
+        self.manager.clear_all_data()
@@ -7,7 +7,7 @@ Checks dependencies and launches the Streamlit application
 import os
 import sys
 import subprocess
-import importlib.util
+from importlib.metadata import PackageNotFoundError, version
 
 def check_python_version():
     """Check if Python version is compatible"""
@@ -21,22 +21,23 @@ def check_python_version():
 
 def check_dependencies():
     """Check if required packages are installed"""
+    # Distribution names, checked from installed metadata without importing anything
     required_packages = [
         'streamlit',
         'openai', 
         'langchain',
         'chromadb',
         'PyPDF2',
-        'docx'
+        'python-docx'
     ]
     
     missing_packages = []
     
     for package in required_packages:
-        if importlib.util.find_spec(package) is None:
+        try:
+            print(f"✅ {package} {version(package)} is installed")
+        except PackageNotFoundError:
             missing_packages.append(package)
-        else:
-            print(f"✅ {package} is installed")
     
     if missing_packages:
         print(f"\n❌ Missing packages: {', '.join(missing_packages)}")
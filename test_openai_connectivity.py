@@ -7,7 +7,7 @@ Usage:
 """
 import os
 from dotenv import load_dotenv
-import litellm
+from llm.litellm_provider import LiteLLMProvider
 
 load_dotenv()
 
@@ -17,14 +17,16 @@ if not API_KEY:
     print("[ERROR] OPENAI_API_KEY environment variable not set.")
     exit(1)
 
+# Constructing the provider installs the same pooled (HTTP/2 when h2 is installed) client the app uses
+provider = LiteLLMProvider(
+    api_key=API_KEY,
+    api_base="https://aiportalapi.stu-platform.live/jpe",
+    model="azure/GPT-4o-mini"
+)
+
 try:
-    response = litellm.completion(
-        model="azure/GPT-4o-mini",
-        messages=[{"role": "user", "content": "What is vector database?"}],
-        api_key=API_KEY,
-        api_base="https://aiportalapi.stu-platform.live/jpe",
-    )
+    content = provider.completion("What is vector database?")
     print("[SUCCESS] Litellm API call succeeded.")
-    print("Response:", response['choices'][0]['message']['content']) # type: ignore
+    print("Response:", content)
 except Exception as e:
     print("[ERROR] Litellm API call failed:", str(e))
\ No newline at end of file
@@ -14,8 +14,8 @@ def patch_litellm_provider():
     with patch('llm.litellm_provider.LiteLLMProvider.chat', return_value='mocked response'), \
          patch('llm.litellm_provider.LiteLLMProvider.completion', return_value='{\"question\": \"Q?\", \"options\": [\"A\", \"B\", \"C\", \"D\"], \"correct_answer\": \"A\"}'), \
          patch('embeddings.embedding_model.EmbeddingModel.get', return_value=Mock(embed_query=lambda x: [0.1, 0.2])), \
-         patch('vectorstores.chroma_store.ChromaStoreManager.create_from_documents', return_value=Mock()), \
-         patch('vectorstores.chroma_store.ChromaStoreManager.load_existing', return_value=Mock()):
+         patch('vector_stores.chroma_store.ChromaStoreManager.create_from_documents', return_value=Mock()), \
+         patch('vector_stores.chroma_store.ChromaStoreManager.load_existing', return_value=Mock()):
         yield
 
 def test_apptest_attributes():
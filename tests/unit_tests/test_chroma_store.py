@@ -1,24 +1,24 @@
 import pytest
 from unittest.mock import patch, Mock
-from vectorstores.chroma_store import ChromaStoreManager
+from vector_stores.chroma_store import ChromaStoreManager, HNSW_COLLECTION_METADATA, relevance_from_distance
 
 class TestChromaStoreManager:
     def setup_method(self):
         self.manager = ChromaStoreManager(persist_directory='test_chroma_db')
 
     def test_create_from_documents(self):
-        with patch('vectorstores.chroma_store.Chroma') as mock_chroma:
+        with patch('vector_stores.chroma_store.Chroma') as mock_chroma:
             mock_instance = Mock()
             mock_chroma.from_documents.return_value = mock_instance
             docs = [Mock()]
             embeddings = Mock()
             result = self.manager.create_from_documents(docs, embeddings)
             assert result is mock_instance
-            mock_chroma.from_documents.assert_called_once_with(documents=docs, embedding=embeddings, persist_directory='test_chroma_db')
+            mock_chroma.from_documents.assert_called_once_with(documents=docs, embedding=embeddings, persist_directory='test_chroma_db', collection_metadata=HNSW_COLLECTION_METADATA)
 
     def test_load_existing(self):
         with patch('os.path.exists', return_value=True), \
-             patch('vectorstores.chroma_store.Chroma') as mock_chroma:
+             patch('vector_stores.chroma_store.Chroma') as mock_chroma:
             mock_instance = Mock()
             mock_chroma.return_value = mock_instance
             embeddings = Mock()
@@ -43,4 +43,15 @@ class TestChromaStoreManager:
             self.manager.vector_store = Mock()
             self.manager.clear()
             mock_rmtree.assert_called_once_with('test_chroma_db')
-            assert self.manager.vector_store is None 
\ No newline at end of file
+            assert self.manager.vector_store is None 
+
+    def test_relevance_from_cosine_distance(self):
+        store = Mock()
+        store._collection.metadata = {"hnsw:space": "cosine"}
+        assert relevance_from_distance(store, 0.25) == 0.75
+        # Legacy collections use Chroma's default squared L2; relevance must still grow as distance shrinks
+        store._collection.metadata = None
+        assert relevance_from_distance(store, 0.25) == 0.875
+        assert relevance_from_distance(store, 0.1) > relevance_from_distance(store, 0.25)
+        store._collection.metadata = {"hnsw:space": "l2"}
+        assert relevance_from_distance(store, 0.5) == 0.75
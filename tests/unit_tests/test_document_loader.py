@@ -7,35 +7,57 @@ class TestDocumentLoader:
         self.loader = DocumentLoader()
 
     def test_load_pdf(self):
-        with patch('loaders.document_loader.PyPDFLoader') as mock_pdf:
+        with patch('loaders.document_loader._loader_class') as mock_loader_class:
             mock_instance = Mock()
             mock_instance.load.return_value = [Mock(metadata={})]
+            mock_pdf = mock_loader_class.return_value
             mock_pdf.return_value = mock_instance
             docs = self.loader.load_document('file.pdf', 'file.pdf')
             assert isinstance(docs, list)
             assert len(docs) == 1
+            mock_loader_class.assert_called_once_with('UnstructuredPDFLoader')
             mock_pdf.assert_called_once()
 
     def test_load_txt(self):
-        with patch('loaders.document_loader.TextLoader') as mock_txt:
+        with patch('loaders.document_loader._loader_class') as mock_loader_class:
             mock_instance = Mock()
             mock_instance.load.return_value = [Mock(metadata={})]
+            mock_txt = mock_loader_class.return_value
             mock_txt.return_value = mock_instance
             docs = self.loader.load_document('file.txt', 'file.txt')
             assert isinstance(docs, list)
             assert len(docs) == 1
+            mock_loader_class.assert_called_once_with('TextLoader')
             mock_txt.assert_called_once()
 
     def test_load_docx(self):
-        with patch('loaders.document_loader.Docx2txtLoader') as mock_docx:
+        with patch('loaders.document_loader._loader_class') as mock_loader_class:
             mock_instance = Mock()
             mock_instance.load.return_value = [Mock(metadata={})]
+            mock_docx = mock_loader_class.return_value
             mock_docx.return_value = mock_instance
             docs = self.loader.load_document('file.docx', 'file.docx')
             assert isinstance(docs, list)
             assert len(docs) == 1
+            mock_loader_class.assert_called_once_with('Docx2txtLoader')
             mock_docx.assert_called_once()
 
+    def test_load_txt_from_bytes(self):
+        docs = self.loader.load_document_from_bytes(memoryview(b'hello world'), 'notes.txt')
+        assert len(docs) == 1
+        assert docs[0].page_content == 'hello world'
+        assert docs[0].metadata['original_filename'] == 'notes.txt'
+        assert docs[0].metadata['file_type'] == 'txt'
+
+    def test_load_docx_from_bytes(self):
+        mock_docx2txt = Mock()
+        mock_docx2txt.process.return_value = 'docx text'
+        with patch.dict('sys.modules', {'docx2txt': mock_docx2txt}):
+            docs = self.loader.load_document_from_bytes(memoryview(b'PK'), 'report.docx')
+        assert docs[0].page_content == 'docx text'
+        assert docs[0].metadata['file_type'] == 'docx'
+        assert mock_docx2txt.process.call_args.args[0].read() == b'PK'
+
     def test_load_unsupported_type(self):
         docs = self.loader.load_document('file.xyz', 'file.xyz')
         assert docs == []
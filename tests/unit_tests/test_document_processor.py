@@ -3,7 +3,7 @@ import os
 import shutil
 import pytest
 from unittest.mock import Mock, patch
-from services.document_processor import DocumentProcessor
+from services.document_processor import DocumentProcessor, _write_temp_file
 
 class TestDocumentProcessor:
     def setup_method(self):
@@ -18,7 +18,7 @@ class TestDocumentProcessor:
     def test_process_uploaded_file(self):
         # Patch loader to avoid real file IO
         with patch.object(self.processor, 'loader') as mock_loader:
-            mock_loader.load_document.return_value = [Mock()]
+            mock_loader.load_document_from_bytes.return_value = [Mock()]
             mock_loader.split_documents.return_value = [Mock(page_content="abc", metadata={})]
             class DummyFile:
                 name = "test.txt"
@@ -28,4 +28,62 @@ class TestDocumentProcessor:
             chunks = self.processor.process_uploaded_file(dummy)
             assert isinstance(chunks, list)
             assert len(chunks) > 0
-            assert hasattr(chunks[0], 'page_content') or isinstance(chunks[0], Mock) 
\ No newline at end of file
+            assert hasattr(chunks[0], 'page_content') or isinstance(chunks[0], Mock) 
+    def test_process_uploaded_file_extra_metadata(self):
+        with patch.object(self.processor, 'loader') as mock_loader:
+            mock_loader.load_document_from_bytes.return_value = [Mock()]
+            mock_loader.split_documents.return_value = [Mock(page_content="abc", metadata={}), Mock(page_content="def", metadata={})]
+            class DummyFile:
+                name = "test.txt"
+                def getbuffer(self):
+                    return b"abc"
+            chunks = self.processor.process_uploaded_file(DummyFile(), extra_metadata={'file_hash': 'h1'})
+            assert all(chunk.metadata['file_hash'] == 'h1' for chunk in chunks)
+            assert all(chunk.metadata['source_file'] == 'test.txt' for chunk in chunks)
+            assert all(chunk.metadata['file_size'] == 3 for chunk in chunks)
+            assert all(chunk.metadata['_file_id'] == 'h1' for chunk in chunks)
+            assert [chunk.metadata['chunk_index'] for chunk in chunks] == [0, 1]
+            mock_loader.load_document_from_bytes.assert_called_once()
+            mock_loader.load_document.assert_not_called()
+
+    def test_reupload_reuses_cached_split(self):
+        with patch.object(self.processor, 'loader') as mock_loader:
+            mock_loader.load_document_from_bytes.return_value = [Mock()]
+            mock_loader.split_documents.return_value = [Mock(page_content="abc", metadata={'page': 1})]
+            class DummyFile:
+                name = "again.txt"
+                def getbuffer(self):
+                    return b"abc"
+            first = self.processor.process_uploaded_file(DummyFile(), extra_metadata={'file_hash': 'reupload-hash'})
+            second = self.processor.process_uploaded_file(DummyFile(), extra_metadata={'file_hash': 'reupload-hash'})
+            mock_loader.load_document_from_bytes.assert_called_once()
+            assert second[0] is not first[0]
+            assert second[0].page_content == "abc"
+            assert second[0].metadata['page'] == 1
+            assert second[0].metadata['file_hash'] == 'reupload-hash'
+
+    def test_temp_file_skips_full_tmpfs(self, tmp_path):
+        usage = Mock(free=2)
+        with patch('services.document_processor.UPLOAD_TEMP_DIR', str(tmp_path)), \
+             patch('services.document_processor.shutil.disk_usage', return_value=usage):
+            path = _write_temp_file(b'abcd', '.pdf')
+        try:
+            assert os.path.dirname(path) != str(tmp_path)
+            with open(path, 'rb') as f:
+                assert f.read() == b'abcd'
+        finally:
+            os.unlink(path)
+
+    def test_temp_file_retries_after_tmpfs_write_error(self, tmp_path):
+        real_temp_file = tempfile.NamedTemporaryFile
+        def temp_file(**kwargs):
+            if kwargs.get('dir') == str(tmp_path):
+                raise OSError(28, 'No space left on device')
+            return real_temp_file(**kwargs)
+        with patch('services.document_processor.UPLOAD_TEMP_DIR', str(tmp_path)), \
+             patch('services.document_processor.tempfile.NamedTemporaryFile', side_effect=temp_file):
+            path = _write_temp_file(b'abcd', '.pdf')
+        try:
+            assert os.path.dirname(path) != str(tmp_path)
+        finally:
+            os.unlink(path)
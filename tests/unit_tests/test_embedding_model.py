@@ -3,6 +3,9 @@ from unittest.mock import Mock, patch
 import embeddings.embedding_model as embedding_module
 
 class TestEmbeddingModel:
+    def setup_method(self):
+        embedding_module._cached_embeddings.cache_clear()
+
     def test_embedding_generation(self):
         # Patch LiteLLMEmbeddings to avoid real API call
         with patch('embeddings.embedding_model.LiteLLMEmbeddings') as mock_embed:
@@ -14,8 +17,36 @@ class TestEmbeddingModel:
             # get() should return the embeddings instance
             assert model.get() is mock_instance
 
+    def test_embeddings_shared_across_instances(self):
+        with patch('embeddings.embedding_model.LiteLLMEmbeddings') as mock_embed:
+            mock_embed.return_value.embed_query.return_value = [0.1, 0.2]
+            first = embedding_module.EmbeddingModel()
+            second = embedding_module.EmbeddingModel()
+            assert first.get() is second.get()
+            assert mock_embed.call_count == 1
+
     def test_invalid_model_name(self):
         # Simulate LiteLLMEmbeddings raising an exception
         with patch('embeddings.embedding_model.LiteLLMEmbeddings', side_effect=Exception("Invalid model")):
             model = embedding_module.EmbeddingModel(model_name="invalid-model")
-            assert model.embeddings is None 
\ No newline at end of file
+            assert model.embeddings is None 
+
+    def test_embed_documents_batches_by_length(self):
+        embedder = embedding_module.LiteLLMEmbeddings(batch_size=2)
+        embedder.provider = Mock()
+        embedder.provider.embed.side_effect = lambda batch: [[float(len(text))] for text in batch]
+        texts = ['ccc', 'a', 'bbbb', 'dd']
+        assert embedder.embed_documents(texts) == [[3.0], [1.0], [4.0], [2.0]]
+        assert embedder.provider.embed.call_args_list[0][0][0] == ['a', 'dd']
+        assert embedder.provider.embed.call_count == 2
+
+    def test_embed_query_cached(self):
+        embedder = embedding_module.LiteLLMEmbeddings(query_cache_size=1)
+        embedder.provider = Mock()
+        embedder.provider.embed.side_effect = lambda batch: [[float(len(batch[0]))]]
+        assert embedder.embed_query('abc') == [3.0]
+        assert embedder.embed_query('abc') == [3.0]
+        assert embedder.provider.embed.call_count == 1
+        embedder.embed_query('de')
+        embedder.embed_query('abc')
+        assert embedder.provider.embed.call_count == 3
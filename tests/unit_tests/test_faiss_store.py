@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import Mock
+
+pytest.importorskip("faiss")
+
+from vector_stores.faiss_store import FaissCollection, FaissStoreManager
+from vector_stores.chroma_store import relevance_from_distance
+
+class TestFaissCollection:
+    def setup_method(self):
+        self.collection = FaissCollection()
+        self.collection.upsert(
+            ids=["a:0", "a:1", "b:0"],
+            embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+            metadatas=[{"file_hash": "a"}, {"file_hash": "a"}, {"file_hash": "b"}],
+            documents=["x", "y", "z"]
+        )
+
+    def test_query_orders_by_cosine(self):
+        result = self.collection.query([[1.0, 0.0]], n_results=2)
+        assert result["ids"] == [["a:0", "b:0"]]
+        assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-6)
+
+    def test_query_with_where(self):
+        result = self.collection.query([[1.0, 0.0]], n_results=2, where={"file_hash": {"$in": ["b"]}})
+        assert result["documents"] == [["z"]]
+
+    def test_upsert_replaces_and_delete_where(self):
+        self.collection.upsert(ids=["a:0"], embeddings=[[0.0, 1.0]], documents=["x2"], metadatas=[{"file_hash": "a"}])
+        assert self.collection.count() == 3
+        assert self.collection.get(ids=["a:0"])["documents"] == ["x2"]
+        self.collection.delete(where={"file_hash": "a"})
+        assert self.collection.get()["ids"] == ["b:0"]
+        assert self.collection.query([[1.0, 0.0]], n_results=5)["ids"] == [["b:0"]]
+
+    def test_get_pages(self):
+        page = self.collection.get(limit=2, offset=1)
+        assert page["ids"] == ["a:1", "b:0"]
+
+class TestFaissStoreManager:
+    def test_persist_and_load(self, tmp_path):
+        embeddings = Mock()
+        embeddings.embed_documents.return_value = [[1.0, 0.0], [0.0, 1.0]]
+        embeddings.embed_query.return_value = [0.0, 1.0]
+        manager = FaissStoreManager(persist_directory=str(tmp_path))
+        manager.create_from_documents([Mock(page_content="x", metadata={}), Mock(page_content="y", metadata={})], embeddings)
+        manager.persist()
+        store = FaissStoreManager(persist_directory=str(tmp_path)).load_existing(embeddings)
+        doc, distance = store.similarity_search_with_score("q", k=1)[0]
+        assert doc.page_content == "y"
+        assert relevance_from_distance(store, distance) == pytest.approx(1.0, abs=1e-6)
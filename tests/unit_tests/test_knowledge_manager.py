@@ -5,6 +5,7 @@ import gc
 import json
 from unittest.mock import Mock, patch
 import pytest
+from langchain.schema import Document
 from knowledge_manager import KnowledgeManager
 
 class TestKnowledgeManager:
@@ -32,7 +33,7 @@ class TestKnowledgeManager:
             mock_instance = Mock()
             mock_instance.embed_query.return_value = [0.1, 0.2]
             mock_embeddings.return_value = mock_instance
-            with patch('vectorstores.chroma_store.Chroma') as mock_chroma:
+            with patch('vector_stores.chroma_store.Chroma') as mock_chroma:
                 mock_vectorstore = Mock()
                 mock_chroma.from_documents.return_value = mock_vectorstore
                 km = KnowledgeManager(persist_directory=self.temp_dir, metadata_file=self.temp_metadata)
@@ -46,18 +47,90 @@ class TestKnowledgeManager:
         hash2 = self.km._get_file_hash(mock_file)
         assert hash1 == hash2
         assert len(hash1) == 32
+    def test_get_file_hash_stream(self):
+        import io
+        stream = io.BytesIO(b'test content')
+        stream.seek(5)
+        mock_file = Mock()
+        mock_file.getbuffer.return_value = b'test content'
+        assert self.km._get_file_hash(stream) == self.km._get_file_hash(mock_file)
+        assert stream.tell() == 5
     def test_search_knowledge_base_empty(self):
         results = self.km.search_knowledge_base("test query")
         assert results == []
     def test_get_random_context_empty(self):
         context = self.km.get_random_context()
         assert context is None
+    def test_get_random_context_prefers_long_chunks(self):
+        long_text = 'x' * 300
+        self.km.documents = [Document(page_content='short'), Document(page_content=long_text)]
+        assert self.km.get_random_context(min_length=200) == long_text
+        assert self.km.get_random_context(min_length=1000) in ('short', long_text)
     def test_get_stats_empty(self):
         stats = self.km.get_stats()
         assert stats['doc_count'] == 0
         assert stats['chunk_count'] == 0
         assert stats['total_chars'] == 0
         assert stats['topic_count'] == 0
+    def test_get_stats_counts_characters(self):
+        self.km.documents = [
+            Document(page_content='a' * 10, metadata={'source_file': 'a.txt'}),
+            Document(page_content='b' * 30, metadata={'source_file': 'b.txt'})
+        ]
+        stats = self.km.get_stats()
+        assert stats['chunk_count'] == 2
+        assert stats['total_chars'] == 40
+        assert stats['avg_chunk_size'] == 20
+        assert sorted(stats['source_files']) == ['a.txt', 'b.txt']
+    def test_remove_processed_file(self):
+        self.km.documents = [
+            Document(page_content='a1', metadata={'file_hash': 'a'}),
+            Document(page_content='b1', metadata={'file_hash': 'b'}),
+            Document(page_content='a2', metadata={'file_hash': 'a'}),
+            Document(page_content='c1', metadata={'file_hash': 'c'})
+        ]
+        assert self.km.remove_processed_file('a') is True
+        assert [doc.page_content for doc in self.km.documents] == ['b1', 'c1']
+        assert self.km.get_stats()['total_chars'] == 4
+        assert self.km.remove_processed_file('c') is True
+        assert [doc.page_content for doc in self.km.documents] == ['b1']
+        assert self.km.remove_processed_file('missing') is False
+
+    def test_remove_processed_file_by_fallback_id(self):
+        self.km.documents = [
+            Document(page_content='s1', metadata={'source_file': 'notes.txt'}),
+            Document(page_content='h1', metadata={'file_hash': 'h', 'source_file': 'notes.txt'}),
+            Document(page_content='o1', metadata={'original_filename': 'other.txt'})
+        ]
+        assert self.km.remove_processed_file('notes.txt') is True
+        assert [doc.page_content for doc in self.km.documents] == ['h1', 'o1']
+        assert self.km.remove_processed_file('other.txt') is True
+        assert [doc.page_content for doc in self.km.documents] == ['h1']
+
+    def test_remove_processed_file_drops_invalid_entries(self):
+        self.km.documents = [
+            Document(page_content='a1', metadata={'file_hash': 'a'}),
+            'not a document',
+            Document(page_content='b1', metadata={'file_hash': 'b'})
+        ]
+        assert self.km.remove_processed_file('a') is True
+        assert [doc.page_content for doc in self.km.documents] == ['b1']
+    def test_reupload_replaces_in_memory_chunks(self):
+        upload = Mock()
+        upload.name = 'a.txt'
+        upload.getbuffer.return_value = b'content'
+        embeddings = Mock()
+        embeddings.embed_documents.side_effect = lambda texts: [[0.1] for _ in texts]
+        with patch.object(self.km, '_get_validated_embeddings', return_value=embeddings), \
+             patch.object(self.km.vector_store_service, 'add_embedded_documents', return_value=Mock()), \
+             patch.object(self.km.vector_store_service, 'persist'):
+            for content in ('v1', 'v2'):
+                file_hash = self.km._get_file_hash(upload)
+                chunk = Document(page_content=content, metadata={'file_hash': file_hash})
+                with patch.object(self.km, '_ingest_one', return_value=[chunk]):
+                    assert self.km.process_documents([upload])['success'] is True
+        assert [doc.page_content for doc in self.km.documents] == ['v2']
+
     def test_duplicate_file_upload(self):
         # Simulate uploading the same file twice
         mock_file = Mock()
@@ -1,6 +1,6 @@
 from unittest.mock import Mock
 import pytest
-from agents.quiz_agent import QuizAgent
+from agents.quiz_agent import QuizAgent, MIXED_QUESTION_TYPES, QUESTION_QUEUE_SIZE, QUIZ_CACHE_KEY_CHARS
 from knowledge_manager import KnowledgeManager
 
 class TestQuizAgent:
@@ -31,6 +31,120 @@ class TestQuizAgent:
         assert "question" in result
         assert "LLM error" in result["question"] or result["question"]
 
+    def test_generate_question_served_from_batch_queue(self):
+        mock_llm_provider = Mock()
+        mock_llm_provider.completion = Mock(return_value='[{"question": "Q1", "options": ["A", "B", "C", "D"], "correct_answer": "A"}, {"question": "Q2", "options": ["A", "B", "C", "D"], "correct_answer": "B"}]')
+        self.agent.llm_provider = mock_llm_provider
+        self.mock_retriever.get_random_context.return_value = "context"
+        assert self.agent.generate_question()["question"] == "Q1"
+        assert self.agent.generate_question()["question"] == "Q2"
+        assert mock_llm_provider.completion.call_count == 1
+
+    def test_generate_questions_concurrent(self):
+        mock_llm_provider = Mock()
+        mock_llm_provider.completion = Mock(return_value='{"question": "Q?", "options": ["A", "B", "C", "D"], "correct_answer": "A"}')
+        self.agent.llm_provider = mock_llm_provider
+        self.mock_retriever.get_random_context.return_value = "context"
+        results = self.agent.generate_questions(3, max_concurrency=2)
+        assert [q["question"] for q in results] == ["Q?", "Q?", "Q?"]
+        assert mock_llm_provider.completion.call_count == 3
+        assert self.mock_retriever.get_random_context.call_count == 3
+
+    def test_generate_question_mixed_fans_out(self):
+        mock_llm_provider = Mock()
+        mock_llm_provider.completion = Mock(return_value='{"question": "Q?", "options": ["A", "B", "C", "D"], "correct_answer": "A"}')
+        self.agent.llm_provider = mock_llm_provider
+        self.mock_retriever.get_random_context.return_value = "context"
+        result = self.agent.generate_question(question_type="mixed")
+        assert result["type"] in MIXED_QUESTION_TYPES
+        assert mock_llm_provider.completion.call_count == QUESTION_QUEUE_SIZE
+
+    def test_extract_json_from_fenced_response(self):
+        response = 'Here you go:\n```json\n[{"question": "Q?", "options": ["A", "B"]}]\n```\nDone.'
+        assert self.agent._extract_json_from_response(response) == '[{"question": "Q?", "options": ["A", "B"]}]'
+        assert self.agent._extract_json_from_response('no payload here') is None
+
+    def test_prompt_keeps_static_system_prefix(self):
+        mock_llm_provider = Mock()
+        mock_llm_provider.completion = Mock(return_value='[{"question": "Q?", "options": ["A", "B", "C", "D"], "correct_answer": "A"}]')
+        self.agent.llm_provider = mock_llm_provider
+        self.agent.generate_questions_batch_from_context("first context", 1)
+        self.agent.generate_questions_batch_from_context("second context", 1, difficulty="hard")
+        first, second = mock_llm_provider.completion.call_args_list
+        assert first.kwargs["system"] == second.kwargs["system"]
+        assert "first context" not in first.kwargs["system"]
+        assert second.kwargs["prompt"].rstrip().endswith("second context")
+
+    def test_salvage_questions_from_malformed_output(self):
+        response = '"question": "Is \\"x\\" true?", "correct_answer": "True" "question": "Q2", "correct_answer": "no"'
+        questions = self.agent._salvage_questions(response)
+        assert questions == [
+            {"question": 'Is "x" true?', "correct_answer": "True"},
+            {"question": "Q2", "correct_answer": "no"},
+        ]
+
+    def test_salvage_tolerates_raw_newlines_and_bad_escapes(self):
+        response = '"question": "Line one\nline two", "correct_answer": "yes" "question": "Bad \\x escape", "correct_answer": "no"'
+        questions = self.agent._salvage_questions(response)
+        assert questions == [{"question": "Line one\nline two", "correct_answer": "yes"}]
+
+    def test_stream_questions_batch(self):
+        response = '<result>[{"question": "Q1", "options": ["A", "B", "C", "D"], "correct_answer": "A"}, {"question": "Q2", "options": ["A", "B", "C", "D"], "correct_answer": "B"}]</result>'
+        mock_llm_provider = Mock()
+        mock_llm_provider.stream_completion = Mock(return_value=iter([response[i:i + 9] for i in range(0, len(response), 9)]))
+        self.agent.llm_provider = mock_llm_provider
+        questions = list(self.agent.stream_questions_batch_from_context("context", 2))
+        assert [q["question"] for q in questions] == ["Q1", "Q2"]
+
+    def test_stream_skips_braces_in_preamble(self):
+        response = 'Thinking about {the context} first [1].\n<result>[{"question": "Q1", "options": ["A", "B", "C", "D"], "correct_answer": "A"}]</result>'
+        mock_llm_provider = Mock()
+        mock_llm_provider.stream_completion = Mock(return_value=iter([response[i:i + 5] for i in range(0, len(response), 5)]))
+        self.agent.llm_provider = mock_llm_provider
+        questions = list(self.agent.stream_questions_batch_from_context("context", 1))
+        assert [q["question"] for q in questions] == ["Q1"]
+
+    def test_stream_parses_whole_response_when_nothing_streamed(self):
+        response = 'Here you go: {"question": "Q1", "options": ["A", "B", "C", "D"], "correct_answer": "A"}'
+        mock_llm_provider = Mock()
+        mock_llm_provider.stream_completion = Mock(return_value=iter([response]))
+        self.agent.llm_provider = mock_llm_provider
+        questions = list(self.agent.stream_questions_batch_from_context("context", 1))
+        assert [q["question"] for q in questions] == ["Q1"]
+
+    def test_stream_cache_key_bounded_and_bypassable(self):
+        response = '<result>[{"question": "Q1", "options": ["A", "B", "C", "D"], "correct_answer": "A"}]</result>'
+        mock_llm_provider = Mock()
+        mock_llm_provider.stream_completion = Mock(side_effect=lambda **kwargs: iter([response]))
+        self.agent.llm_provider = mock_llm_provider
+        self.agent.semantic_cache = Mock()
+        self.agent.semantic_cache.lookup.return_value = None
+        list(self.agent.stream_questions_batch_from_context("x" * 5000, 1))
+        key = self.agent.semantic_cache.lookup.call_args.args[0]
+        assert key.startswith("multiple_choice|medium|") and len(key) == len("multiple_choice|medium|") + QUIZ_CACHE_KEY_CHARS
+        self.agent.semantic_cache.store.assert_called_once()
+        list(self.agent.stream_questions_batch_from_context("x" * 5000, 1, use_cache=False))
+        assert self.agent.semantic_cache.lookup.call_count == 1
+        assert self.agent.semantic_cache.store.call_count == 1
+        assert mock_llm_provider.stream_completion.call_count == 2
+
+    def test_question_history_bounded(self):
+        for i in range(25):
+            self.agent.add_question_to_history({'question': f'Q{i}'}, 'A', i % 2 == 0)
+        assert len(self.agent.question_history) == 20
+        assert self.agent.question_history[0]['question'] == 'Q5'
+        assert self.agent.question_history[-1]['correct'] is True
+
+    def test_adaptive_difficulty(self):
+        assert self.agent._resolve_difficulty('adaptive') == 'medium'
+        for correct in (True, True, True):
+            self.agent.add_question_to_history({}, 'A', correct)
+        assert self.agent._resolve_difficulty('adaptive') == 'hard'
+        self.agent.add_question_to_history({}, 'A', False)
+        self.agent.add_question_to_history({}, 'A', False)
+        assert self.agent._resolve_difficulty('adaptive') == 'easy'
+        assert self.agent._resolve_difficulty('hard') == 'hard'
+
     def test_check_answer_multiple_choice(self):
         question_data = {
             'type': 'multiple_choice',
@@ -56,4 +170,13 @@ class TestQuizAgent:
             'correct_answer': 'Machine Learning'
         }
         assert self.agent.check_answer('Machine Learning', question_data) is True
-        assert self.agent.check_answer('machine learning', question_data) is True 
\ No newline at end of file
+        assert self.agent.check_answer('machine learning', question_data) is True 
+
+    def test_check_answer_precomputed_synonyms(self):
+        question = self.agent._post_process_question({
+            'type': 'short_answer', 'question': 'Q?', 'correct_answer': 'Straße',
+            'synonyms': ['Strasse road'], 'explanation': '', 'source': '', 'difficulty': 'easy'
+        }, 'short_answer')
+        assert question['_syn_norm'] == frozenset({'strasse road'})
+        assert self.agent.check_answer('STRASSE', question) is True
+        assert self.agent.check_answer('strasse road', question) is True
@@ -0,0 +1,10 @@
+import numpy as np
+import pytest
+from retrievers.scoring import normalize_rows, top_k_indices
+
+class TestScoring:
+    def test_top_k_on_normalized_matrix(self):
+        matrix = normalize_rows([[3.0, 0.0], [1.0, 1.0], [0.0, 5.0]])
+        assert matrix.dtype == np.float32 and matrix.flags['C_CONTIGUOUS']
+        scores = matrix @ np.array([1.0, 0.0], dtype=np.float32)
+        assert list(top_k_indices(scores, 2)) == [0, 1]
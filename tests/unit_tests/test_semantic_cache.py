@@ -0,0 +1,68 @@
+from unittest.mock import Mock
+import pytest
+from services.semantic_cache import SemanticCache
+
+class TestSemanticCache:
+    def setup_method(self):
+        self.embeddings = Mock()
+        vectors = {'a': [1.0, 0.0], 'a2': [0.99, 0.05], 'b': [0.0, 1.0]}
+        self.embeddings.embed_query.side_effect = lambda text: vectors[text]
+        self.cache = SemanticCache(self.embeddings, threshold=0.92)
+
+    def test_hit_for_similar_text(self):
+        compute = Mock(return_value='first')
+        assert self.cache.get_or_compute('a', compute) == 'first'
+        assert self.cache.get_or_compute('a2', Mock(return_value='second')) == 'first'
+        assert compute.call_count == 1
+
+    def test_miss_for_dissimilar_text(self):
+        self.cache.get_or_compute('a', Mock(return_value='first'))
+        assert self.cache.get_or_compute('b', Mock(return_value='second')) == 'second'
+        assert len(self.cache) == 2
+
+    def test_persisted_entries_reload(self, tmp_path):
+        path = str(tmp_path / 'cache.db')
+        SemanticCache(self.embeddings, path=path).get_or_compute('a', Mock(return_value='stored'))
+        reloaded = SemanticCache(self.embeddings, path=path)
+        assert reloaded.get_or_compute('a', Mock(return_value='fresh')) == 'stored'
+
+    def test_matrix_grows_past_initial_capacity(self, monkeypatch):
+        monkeypatch.setattr('services.semantic_cache.INITIAL_CAPACITY', 1)
+        self.cache.get_or_compute('a', Mock(return_value='first'))
+        self.cache.get_or_compute('b', Mock(return_value='second'))
+        assert len(self.cache) == 2
+        assert self.cache.get_or_compute('a2', Mock(return_value='third')) == 'first'
+
+    def test_discriminator_must_match_exactly(self):
+        self.cache.get_or_compute('a', Mock(return_value='easy'), discriminator=('mc', 'easy', 5))
+        assert self.cache.get_or_compute('a2', Mock(return_value='hard'), discriminator=('mc', 'hard', 5)) == 'hard'
+        assert self.cache.lookup('a2', discriminator=('mc', 'easy', 5)) == 'easy'
+        assert self.cache.lookup('a2', discriminator=('mc', 'hard', 5)) == 'hard'
+        assert self.cache.lookup('a2') is None
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr('services.semantic_cache.time.time', lambda: clock[0])
+        cache = SemanticCache(self.embeddings, ttl=60)
+        cache.get_or_compute('a', Mock(return_value='first'))
+        assert cache.lookup('a2') == 'first'
+        clock[0] += 61
+        assert cache.lookup('a2') is None
+        assert len(cache) == 0
+
+    def test_oldest_entries_evicted_past_max_entries(self):
+        cache = SemanticCache(self.embeddings, max_entries=1)
+        cache.get_or_compute('a', Mock(return_value='first'))
+        cache.get_or_compute('b', Mock(return_value='second'))
+        assert len(cache) == 1
+        assert cache.lookup('a2') is None
+        assert cache.lookup('b') == 'second'
+
+    def test_expired_rows_deleted_from_sqlite(self, tmp_path, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr('services.semantic_cache.time.time', lambda: clock[0])
+        path = str(tmp_path / 'cache.db')
+        SemanticCache(self.embeddings, path=path, ttl=60).get_or_compute('a', Mock(return_value='stored'))
+        clock[0] += 61
+        assert len(SemanticCache(self.embeddings, path=path, ttl=60)) == 0
+        assert len(SemanticCache(self.embeddings, path=path)) == 0
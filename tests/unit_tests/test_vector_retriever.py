@@ -1,11 +1,12 @@
 import pytest
-from unittest.mock import Mock
-from retrievers.vector_retriever import VectorStoreRetriever
+from unittest.mock import Mock, patch
+from retrievers.vector_retriever import QUERY_CACHE_TTL, VectorStoreRetriever
 
 class TestVectorStoreRetriever:
     def test_similarity_search(self):
         mock_vectorstore = Mock()
-        mock_vectorstore.similarity_search_with_score.return_value = [
+        mock_vectorstore.embeddings.embed_query.return_value = [1.0, 0.0]
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [
             (Mock(page_content='A', metadata={'meta': 1}), 0.9),
             (Mock(page_content='B', metadata={'meta': 2}), 0.8)
         ]
@@ -16,6 +17,34 @@ class TestVectorStoreRetriever:
         assert results[0]['content'] == 'A'
         assert results[1]['content'] == 'B'
 
+    def test_similarity_search_cached_per_scope(self):
+        mock_vectorstore = Mock()
+        mock_vectorstore.embeddings.embed_query.return_value = [1.0, 0.0]
+        search = mock_vectorstore.similarity_search_by_vector_with_relevance_scores
+        search.return_value = [(Mock(page_content='A', metadata={}), 0.9)]
+        retriever = VectorStoreRetriever(mock_vectorstore)
+        first = retriever.similarity_search('query', k=2)
+        assert mock_vectorstore.embeddings.embed_query.call_count == 1
+        assert search.call_args.args[0] == [1.0, 0.0]
+        assert retriever.similarity_search('query again', k=2) == first
+        assert search.call_count == 1
+        retriever.similarity_search('query', k=2, selected_documents=['h1'])
+        assert search.call_count == 2
+        mock_vectorstore.similarity_search_with_score.assert_not_called()
+
+    def test_similarity_search_cache_expires(self):
+        mock_vectorstore = Mock()
+        mock_vectorstore.embeddings.embed_query.return_value = [1.0, 0.0]
+        search = mock_vectorstore.similarity_search_by_vector_with_relevance_scores
+        search.return_value = [(Mock(page_content='A', metadata={}), 0.9)]
+        retriever = VectorStoreRetriever(mock_vectorstore)
+        clock = [1000.0]
+        with patch('services.semantic_cache.time.time', lambda: clock[0]):
+            retriever.similarity_search('query', k=2)
+            clock[0] += QUERY_CACHE_TTL + 1
+            retriever.similarity_search('query', k=2)
+        assert search.call_count == 2
+
     def test_similarity_search_empty(self):
         retriever = VectorStoreRetriever(None)
         results = retriever.similarity_search('query')
@@ -33,11 +62,53 @@ class TestVectorStoreRetriever:
 
     def test_get_context_by_topic(self):
         mock_vectorstore = Mock()
-        mock_vectorstore.similarity_search.return_value = [Mock(page_content='topic1'), Mock(page_content='topic2')]
+        mock_vectorstore.embeddings.embed_documents.return_value = [[1.0, 0.0]]
+        mock_vectorstore._collection.query.return_value = {'documents': [['topic1', 'topic2']]}
         retriever = VectorStoreRetriever(mock_vectorstore)
         results = retriever.get_context_by_topic('topic', k=2)
         assert results == ['topic1', 'topic2']
 
+    def test_get_context_by_topics_batched(self):
+        mock_vectorstore = Mock()
+        mock_vectorstore.embeddings.embed_documents.side_effect = lambda topics: [[float(len(t)), 1.0] for t in topics]
+        mock_vectorstore._collection.query.return_value = {'documents': [['a'], ['b']]}
+        retriever = VectorStoreRetriever(mock_vectorstore)
+        assert retriever.get_context_by_topics(['x', 'yy'], k=1) == [['a'], ['b']]
+        retriever.get_context_by_topics(['x', 'yy'], k=1)
+        mock_vectorstore.embeddings.embed_documents.assert_called_once_with(['x', 'yy'])
+        assert mock_vectorstore._collection.query.call_count == 2
+
+    def test_failed_topic_embeddings_not_cached(self):
+        mock_vectorstore = Mock()
+        mock_vectorstore.embeddings.embed_documents.side_effect = [[[], [1.0, 0.0]], [[0.0, 1.0]]]
+        mock_vectorstore._collection.query.return_value = {'documents': [['b']]}
+        retriever = VectorStoreRetriever(mock_vectorstore)
+        assert retriever.get_context_by_topics(['x', 'yy'], k=1) == [[], ['b']]
+        assert mock_vectorstore._collection.query.call_args.kwargs['query_embeddings'] == [[1.0, 0.0]]
+        retriever.get_context_by_topics(['x', 'yy'], k=1)
+        assert mock_vectorstore.embeddings.embed_documents.call_args.args[0] == ['x']
+
     def test_get_context_by_topic_empty(self):
         retriever = VectorStoreRetriever(None)
-        assert retriever.get_context_by_topic('topic') == [] 
\ No newline at end of file
+        assert retriever.get_context_by_topic('topic') == [] 
+    def test_get_random_context_filters_and_prefers_long(self):
+        docs = [
+            Mock(page_content='x' * 300, metadata={'file_hash': 'a'}),
+            Mock(page_content='short', metadata={'file_hash': 'b'}),
+            Mock(page_content='y' * 300, metadata={'file_hash': 'c'})
+        ]
+        retriever = VectorStoreRetriever(None, documents=docs)
+        for _ in range(10):
+            assert retriever.get_random_context(min_length=200, selected_documents=['a', 'b']) == 'x' * 300
+        assert retriever.get_random_context(min_length=200, selected_documents=['b']) == 'short'
+        assert retriever.get_random_context(selected_documents=['missing']) is None
+
+    def test_iter_all_chunks_pages(self):
+        mock_vectorstore = Mock()
+        mock_vectorstore.get.side_effect = [
+            {'documents': ['a', 'b'], 'metadatas': [{}, {}]},
+            {'documents': ['c'], 'metadatas': [{}]}
+        ]
+        retriever = VectorStoreRetriever(mock_vectorstore)
+        assert [chunk['content'] for chunk in retriever.iter_all_chunks(batch_size=2)] == ['a', 'b', 'c']
+        assert mock_vectorstore.get.call_args.kwargs['offset'] == 2
@@ -24,4 +24,33 @@ class TestVectorStoreService:
     def test_persist(self):
         with patch.object(self.service.manager, 'persist') as mock_persist:
             self.service.persist()
-            mock_persist.assert_called() 
\ No newline at end of file
+            mock_persist.assert_called() 
+    def test_add_embedded_documents(self):
+        with patch.object(self.service.manager, 'add_embeddings') as mock_add:
+            mock_add.return_value = Mock()
+            docs, vectors, ids = [Mock()], [[0.1, 0.2]], ["h:0"]
+            result = self.service.add_embedded_documents(docs, vectors, ids, Mock(), create=True)
+            assert result is mock_add.return_value
+            assert self.service.vector_store is result
+            assert mock_add.call_args.kwargs['create'] is True
+
+    def test_delete_by_file_id_uses_fallback_chain(self):
+        self.service.manager.vector_store = Mock()
+        self.service.manager.vector_store.get.return_value = {
+            'ids': ['1', '2', '3'],
+            'metadatas': [{'source_file': 'a.txt'}, {'file_hash': 'h', 'source_file': 'a.txt'}, {'original_filename': 'a.txt'}]
+        }
+        with patch.object(self.service.manager, 'delete_ids') as mock_delete:
+            assert self.service.delete_by_file_id('a.txt') == 2
+            mock_delete.assert_called_once_with(['1', '3'])
+
+    def test_create_from_documents_batches(self):
+        docs = [Mock() for _ in range(5)]
+        with patch('services.vector_store_service.CHROMA_BATCH_SIZE', 2), \
+             patch.object(self.service.manager, 'create_from_documents') as mock_create, \
+             patch.object(self.service.manager, 'add_documents') as mock_add, \
+             patch.object(self.service.manager, 'persist') as mock_persist:
+            self.service.create_from_documents(docs, Mock())
+            assert mock_create.call_args.args[0] == docs[:2]
+            assert [c.args[0] for c in mock_add.call_args_list] == [docs[2:4], docs[4:]]
+            mock_persist.assert_called_once()
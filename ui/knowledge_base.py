@@ -4,6 +4,19 @@ from datetime import datetime
 from agents.quiz_agent import QuizAgent
 from agents.chat_agent import ChatAgent
 from collections import defaultdict
+from services.document_processor import file_group_id
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup; fall back to stdlib json
+    orjson = None
+
+
+def _serialize_export(export_data) -> bytes:
+    """Serialize the knowledge base export to indented UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(export_data, option=orjson.OPT_INDENT_2)
+    return json.dumps(export_data, indent=2).encode('utf-8')
 
 def show_knowledge_base_info(session_state, get_preload_status, get_knowledge_manager, demo_content):
     st.markdown("## 📚 Knowledge Base Overview")
@@ -33,7 +46,7 @@ def show_knowledge_base_info(session_state, get_preload_status, get_knowledge_ma
             file_groups = defaultdict(list)
             for doc in km.documents:
                 meta = getattr(doc, 'metadata', {})
-                file_id = meta.get('file_hash') or meta.get('source_file') or meta.get('original_filename') or 'Unknown'
+                file_id = file_group_id(meta)
                 file_groups[file_id].append(doc)
             processed_files = []
             for file_id, docs in file_groups.items():
@@ -65,10 +78,11 @@ def show_knowledge_base_info(session_state, get_preload_status, get_knowledge_ma
                             try:
                                 km = get_knowledge_manager()
                                 # Remove all docs with this file_hash from km.documents and Chroma
-                                # (Assumes a remove_documents_by_file method or similar, or just filter in memory)
-                                km.documents = [doc for doc in km.documents if (doc.metadata.get('file_hash') or doc.metadata.get('source_file') or doc.metadata.get('original_filename')) != file_info['file_hash']]
-                                st.success(f"Removed {file_info['filename']}")
-                                st.rerun()
+                                if km.remove_processed_file(file_info['file_hash']):
+                                    st.success(f"Removed {file_info['filename']}")
+                                    st.rerun()
+                                else:
+                                    st.error(f"Failed to remove {file_info['filename']}")
                             except Exception as e:
                                 st.error(f"Error removing file: {e}")
         st.subheader("🔧 Management Actions")
@@ -102,7 +116,7 @@ def show_knowledge_base_info(session_state, get_preload_status, get_knowledge_ma
                     export_data = km.export_knowledge_base()
                     st.download_button(
                         "💾 Download Export",
-                        data=json.dumps(export_data, indent=2),
+                        data=_serialize_export(export_data),
                         file_name=f"knowledge_base_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                         mime="application/json"
                     )
@@ -65,14 +65,22 @@ def show_quiz_interface(session_state, handle_answer_submission):
         import random
         # Get aggregated context from all selected documents
         aggregated_context = session_state.quiz_bot.get_aggregated_context(session_state.selected_documents)
-        questions = session_state.quiz_bot.generate_questions_batch_from_context(
+        # Starting again with unchanged settings asks for a new quiz, so skip the response cache
+        quiz_request = (tuple(sorted(selected_docs)), quiz_type, difficulty, num_questions)
+        use_cache = session_state.get('last_quiz_request') != quiz_request
+        session_state.last_quiz_request = quiz_request
+        # Questions arrive one by one as the LLM streams them
+        progress_text = st.empty()
+        for q in session_state.quiz_bot.stream_questions_batch_from_context(
             context=aggregated_context,
             num_questions=num_questions,
             question_type=quiz_type,
-            difficulty=difficulty
-        )
-        for q in questions:
+            difficulty=difficulty,
+            use_cache=use_cache
+        ):
             session_state.quiz_questions.append(q)
+            progress_text.caption(f"Generated {len(session_state.quiz_questions)}/{num_questions} questions...")
+        progress_text.empty()
         # Filter out fallback questions
         session_state.quiz_questions = [q for q in session_state.quiz_questions if not (q.get('question', '').startswith('No context available'))]
         session_state.current_question_index = 0
@@ -133,6 +141,7 @@ def show_quiz_interface(session_state, handle_answer_submission):
 
 def handle_answer_submission(session_state, user_answer, question_data):
     is_correct = session_state.quiz_bot.check_answer(user_answer, question_data)
+    session_state.quiz_bot.add_question_to_history(question_data, user_answer, is_correct)
     session_state.score['total'] += 1
     if is_correct:
         session_state.score['correct'] += 1
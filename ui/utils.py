@@ -126,7 +126,7 @@ def get_preload_status(km):
         'is_preloaded': getattr(km, 'is_preloaded', False),
         'processed_files_count': len(getattr(km, 'processed_files', {})),
         'processed_files': list(getattr(km, 'processed_files', {}).keys()),
-        'vectorstore_available': getattr(km, 'vectorstore', None) is not None,
+        'vectorstore_available': getattr(km, 'vector_store', None) is not None,
         'embeddings_ready': getattr(getattr(km, 'embedder', None), 'get', lambda: None)() is not None
     }
 
@@ -3,6 +3,33 @@ import logging
 from typing import List, Any, Optional
 from langchain_chroma import Chroma
 
+# Records per Chroma write (add or upsert); one huge insert rebuilds the HNSW index and rewrites far more data
+CHROMA_BATCH_SIZE = int(os.getenv("CHROMA_BATCH_SIZE", "500"))
+# HNSW parameters for newly created collections. The index space is fixed at creation,
+# so collections that already exist on disk keep whatever they were built with.
+HNSW_COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 64,
+    "hnsw:search_ef": 80,
+}
+
+def relevance_from_distance(vector_store: Any, distance: float) -> float:
+    """
+    Convert a Chroma distance to a higher-is-better relevance score in every index space.
+    Cosine (and inner-product) distances become 1 - distance. Collections created before
+    HNSW_COLLECTION_METADATA use Chroma's default squared L2, which equals 2 - 2 * cosine
+    for unit-length embeddings, so 1 - distance / 2 puts them on the same scale and direction.
+    """
+    try:
+        metadata = vector_store._collection.metadata
+    except AttributeError:
+        metadata = None
+    space = metadata.get("hnsw:space", "l2") if isinstance(metadata, dict) else "l2"
+    if space == "l2":
+        return 1.0 - distance / 2.0
+    return 1.0 - distance
+
 class ChromaStoreManager:
     """
     Handles creation, loading, persistence, clearing, and rebuilding of the Chroma vector store.
@@ -18,7 +45,8 @@ class ChromaStoreManager:
         self.vector_store = Chroma.from_documents(
             documents=documents,
             embedding=embeddings,
-            persist_directory=self.persist_directory
+            persist_directory=self.persist_directory,
+            collection_metadata=HNSW_COLLECTION_METADATA
         )
         logging.info("Created new vector database")
         return self.vector_store
@@ -48,6 +76,37 @@ class ChromaStoreManager:
             self.vector_store.add_documents(documents)
             logging.info(f"Added {len(documents)} new chunks to existing vector database")
 
+    def add_embeddings(self, documents: List[Any], vectors: List[List[float]], ids: List[str], embeddings: Any, create: bool = False) -> Chroma:
+        """
+        Bulk-insert documents with precomputed vectors, bypassing re-embedding inside Chroma.
+        Creates the store first when none exists (or create=True). Upserts keep re-uploads idempotent.
+        """
+        if create or self.vector_store is None:
+            self.vector_store = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=embeddings,
+                collection_metadata=HNSW_COLLECTION_METADATA
+            )
+        collection = self.vector_store._collection
+        for start in range(0, len(documents), CHROMA_BATCH_SIZE):
+            batch = documents[start:start + CHROMA_BATCH_SIZE]
+            collection.upsert(
+                ids=ids[start:start + CHROMA_BATCH_SIZE],
+                embeddings=vectors[start:start + CHROMA_BATCH_SIZE],
+                metadatas=[doc.metadata for doc in batch],
+                documents=[doc.page_content for doc in batch]
+            )
+        logging.info(f"Upserted {len(documents)} pre-embedded chunks into vector database")
+        return self.vector_store
+
+    def delete_ids(self, ids: List[str]) -> None:
+        """
+        Delete records by id in place.
+        """
+        if self.vector_store and ids:
+            self.vector_store._collection.delete(ids=ids)
+            logging.info(f"Deleted {len(ids)} chunks from vector database")
+
     def persist(self):
         """
         Persist the current vector store to disk.
@@ -0,0 +1,326 @@
+import os
+import uuid
+import pickle
+import logging
+from typing import List, Any, Dict, Optional
+import numpy as np
+import faiss
+from langchain.schema import Document
+from retrievers.scoring import normalize_rows, top_k_indices
+
+# Collections up to this size use an exact flat inner-product index; larger ones switch to HNSW
+FLAT_INDEX_MAX_VECTORS = 50_000
+# Graph neighbours per node once a collection outgrows the flat index
+HNSW_M = 32
+INDEX_FILE = "faiss.index"
+DOCSTORE_FILE = "faiss_docstore.pkl"
+
+def _matches(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    """Evaluate the subset of Chroma where-filters used in this app: equality, $eq and $in per key, and $or."""
+    for key, condition in where.items():
+        if key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        if key.startswith("$"):
+            raise ValueError(f"Unsupported where operator: {key}")
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+class FaissCollection:
+    """
+    In-memory stand-in for a Chroma collection: vectors live in a faiss index (normalized, so
+    inner product is cosine similarity), ids/documents/metadatas in parallel lists by row.
+    """
+    # Distances are reported as 1 - cosine similarity, so relevance_from_distance treats them like Chroma's
+    metadata = {"hnsw:space": "cosine"}
+
+    def __init__(self, index: Any = None, ids: Optional[List[str]] = None, documents: Optional[List[str]] = None, metadatas: Optional[List[Dict[str, Any]]] = None):
+        self._index = index
+        self._ids = ids or []
+        self._documents = documents or []
+        self._metadatas = metadatas or []
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def _new_index(self, dim: int, size: int):
+        if size > FLAT_INDEX_MAX_VECTORS:
+            return faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        return faiss.IndexFlatIP(dim)
+
+    def _vectors(self, rows: Optional[List[int]] = None) -> np.ndarray:
+        """Stored (normalized) vectors for the given rows, or all rows; read back from the index itself."""
+        if rows is None:
+            return self._index.reconstruct_n(0, self._index.ntotal)
+        if not len(rows):
+            return np.empty((0, self._index.d), dtype=np.float32)
+        return np.stack([self._index.reconstruct(int(i)) for i in rows])
+
+    def _rebuild(self, vectors: np.ndarray) -> None:
+        self._index = self._new_index(vectors.shape[1], len(vectors))
+        if len(vectors):
+            self._index.add(vectors)
+
+    def _select(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> List[int]:
+        if ids is not None:
+            rows = [self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions]
+        else:
+            rows = range(len(self._ids))
+        if where:
+            return [i for i in rows if _matches(self._metadatas[i], where)]
+        return list(rows)
+
+    def upsert(self, ids: List[str], embeddings: Any, metadatas: Optional[List[Dict[str, Any]]] = None, documents: Optional[List[str]] = None) -> None:
+        if not ids:
+            return
+        vectors = normalize_rows(embeddings)
+        metadatas = metadatas or [{} for _ in ids]
+        documents = documents or ["" for _ in ids]
+        existing_rows = len(self._ids)
+        new_rows, replaced = [], []
+        for i, chunk_id in enumerate(ids):
+            position = self._positions.get(chunk_id)
+            if position is None:
+                self._positions[chunk_id] = len(self._ids)
+                self._ids.append(chunk_id)
+                self._documents.append(documents[i])
+                self._metadatas.append(metadatas[i])
+                new_rows.append(i)
+            else:
+                self._documents[position] = documents[i]
+                self._metadatas[position] = metadatas[i]
+                replaced.append((position, i))
+        if self._index is None:
+            self._rebuild(vectors[new_rows])
+        elif replaced or len(self._ids) > FLAT_INDEX_MAX_VECTORS >= existing_rows:
+            # faiss indexes are append-only, so overwriting vectors or switching index type means a rebuild
+            combined = np.vstack([self._vectors(), vectors[new_rows]])
+            for position, i in replaced:
+                combined[position] = vectors[i]
+            self._rebuild(combined)
+        elif new_rows:
+            self._index.add(vectors[new_rows])
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        if ids is None and where is None:
+            return
+        removed = set(self._select(ids, where))
+        if not removed:
+            return
+        keep = [i for i in range(len(self._ids)) if i not in removed]
+        vectors = self._vectors(keep)
+        self._ids = [self._ids[i] for i in keep]
+        self._documents = [self._documents[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+        self._rebuild(vectors)
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None, limit: Optional[int] = None, offset: Optional[int] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        include = include if include is not None else ["documents", "metadatas"]
+        rows = self._select(ids, where)[offset or 0:]
+        if limit is not None:
+            rows = rows[:limit]
+        result: Dict[str, Any] = {'ids': [self._ids[i] for i in rows]}
+        if "documents" in include:
+            result['documents'] = [self._documents[i] for i in rows]
+        if "metadatas" in include:
+            result['metadatas'] = [self._metadatas[i] for i in rows]
+        if "embeddings" in include:
+            result['embeddings'] = self._vectors(rows) if self._index is not None else np.empty((0, 0), dtype=np.float32)
+        return result
+
+    def query(self, query_embeddings: Any, n_results: int = 10, where: Optional[Dict[str, Any]] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        include = include if include is not None else ["documents", "metadatas", "distances"]
+        queries = normalize_rows(query_embeddings)
+        hits = []
+        if self._index is None or not self._ids:
+            hits = [([], []) for _ in queries]
+        elif where is None:
+            scores, rows = self._index.search(queries, min(n_results, len(self._ids)))
+            hits = [([int(r) for r in row if r >= 0], [float(s) for s, r in zip(score, row) if r >= 0]) for score, row in zip(scores, rows)]
+        else:
+            # Filtered queries score the matching rows exactly; collections on this backend are small
+            candidates = np.asarray(self._select(None, where), dtype=np.intp)
+            vectors = self._vectors(candidates)
+            for query in queries:
+                scores = vectors @ query
+                top = top_k_indices(scores, n_results)
+                hits.append(([int(candidates[i]) for i in top], [float(scores[i]) for i in top]))
+        result: Dict[str, Any] = {'ids': [[self._ids[i] for i in rows] for rows, _ in hits]}
+        if "documents" in include:
+            result['documents'] = [[self._documents[i] for i in rows] for rows, _ in hits]
+        if "metadatas" in include:
+            result['metadatas'] = [[self._metadatas[i] for i in rows] for rows, _ in hits]
+        if "distances" in include:
+            result['distances'] = [[1.0 - score for score in scores] for _, scores in hits]
+        return result
+
+    def save(self, directory: str) -> None:
+        """Write the index and the docstore as two files, each replaced atomically."""
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, INDEX_FILE)
+        if self._index is not None:
+            faiss.write_index(self._index, index_path + ".tmp")
+            os.replace(index_path + ".tmp", index_path)
+        elif os.path.exists(index_path):
+            os.remove(index_path)
+        docstore_path = os.path.join(directory, DOCSTORE_FILE)
+        with open(docstore_path + ".tmp", "wb") as f:
+            pickle.dump({'ids': self._ids, 'documents': self._documents, 'metadatas': self._metadatas}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(docstore_path + ".tmp", docstore_path)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["FaissCollection"]:
+        docstore_path = os.path.join(directory, DOCSTORE_FILE)
+        if not os.path.exists(docstore_path):
+            return None
+        with open(docstore_path, "rb") as f:
+            docstore = pickle.load(f)
+        index_path = os.path.join(directory, INDEX_FILE)
+        index = faiss.read_index(index_path) if os.path.exists(index_path) else None
+        return cls(index, docstore['ids'], docstore['documents'], docstore['metadatas'])
+
+class FaissVectorStore:
+    """
+    The part of the langchain Chroma interface this app relies on (add_documents, get,
+    similarity_search[_with_score], similarity_search_by_vector_with_relevance_scores,
+    embeddings, _collection), backed by a FaissCollection.
+    """
+    def __init__(self, embeddings: Any, collection: Optional[FaissCollection] = None):
+        self.embeddings = embeddings
+        self._collection = collection or FaissCollection()
+
+    def add_documents(self, documents: List[Any], ids: Optional[List[str]] = None) -> List[str]:
+        if not documents:
+            return []
+        ids = ids or [str(uuid.uuid4()) for _ in documents]
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in documents])
+        self._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            metadatas=[doc.metadata for doc in documents],
+            documents=[doc.page_content for doc in documents]
+        )
+        return ids
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None, limit: Optional[int] = None, offset: Optional[int] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        return self._collection.get(ids=ids, where=where, limit=limit, offset=offset, include=include)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        return self.similarity_search_by_vector_with_relevance_scores(self.embeddings.embed_query(query), k=k, filter=filter)
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        # Like Chroma's method of the same name, the scores are distances (1 - cosine similarity)
+        result = self._collection.query([embedding], n_results=k, where=filter)
+        return [
+            (Document(page_content=content, metadata=metadata), distance)
+            for content, metadata, distance in zip(result['documents'][0], result['metadatas'][0], result['distances'][0])
+        ]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[Any]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def delete_collection(self) -> None:
+        self._collection = FaissCollection()
+
+class FaissStoreManager:
+    """
+    Drop-in alternative to ChromaStoreManager for small, single-session corpora: an in-memory
+    faiss index persisted as one index file plus one pickled docstore.
+    """
+    def __init__(self, persist_directory: str = "./chroma_db"):
+        self.persist_directory = persist_directory
+        self.vector_store: Optional[FaissVectorStore] = None
+
+    def create_from_documents(self, documents: List[Any], embeddings: Any) -> FaissVectorStore:
+        """
+        Create a new faiss vector store from documents and embeddings.
+        """
+        self.vector_store = FaissVectorStore(embeddings)
+        self.vector_store.add_documents(documents)
+        logging.info("Created new faiss vector database")
+        return self.vector_store
+
+    def load_existing(self, embeddings: Any) -> Optional[FaissVectorStore]:
+        """
+        Load a persisted faiss vector store if available.
+        """
+        try:
+            collection = FaissCollection.load(self.persist_directory)
+        except Exception as e:
+            logging.warning(f"Faiss vector database exists but may be corrupted: {e}")
+            collection = None
+        if collection is None:
+            return None
+        self.vector_store = FaissVectorStore(embeddings, collection)
+        logging.info("Loaded existing faiss vector database")
+        return self.vector_store
+
+    def add_documents(self, documents: List[Any]):
+        """
+        Add new documents to the existing vector store.
+        """
+        if self.vector_store:
+            self.vector_store.add_documents(documents)
+            logging.info(f"Added {len(documents)} new chunks to existing faiss vector database")
+
+    def add_embeddings(self, documents: List[Any], vectors: List[List[float]], ids: List[str], embeddings: Any, create: bool = False) -> FaissVectorStore:
+        """
+        Bulk-insert documents with precomputed vectors. Creates the store first when none exists
+        (or create=True). Upserts keep re-uploads idempotent.
+        """
+        if create or self.vector_store is None:
+            self.vector_store = FaissVectorStore(embeddings)
+        self.vector_store._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            metadatas=[doc.metadata for doc in documents],
+            documents=[doc.page_content for doc in documents]
+        )
+        logging.info(f"Upserted {len(documents)} pre-embedded chunks into faiss vector database")
+        return self.vector_store
+
+    def delete_ids(self, ids: List[str]) -> None:
+        """
+        Delete records by id and persist the result.
+        """
+        if self.vector_store and ids:
+            self.vector_store._collection.delete(ids=ids)
+            self.persist()
+            logging.info(f"Deleted {len(ids)} chunks from faiss vector database")
+
+    def persist(self):
+        """
+        Write the index and docstore to persist_directory; unlike Chroma, nothing is written until this is called.
+        """
+        if self.vector_store:
+            self.vector_store._collection.save(self.persist_directory)
+            logging.info("Persisted faiss vector database")
+
+    def clear_all_data(self):
+        """
+        Clear all data from the faiss vector store and persist the empty store.
+        """
+        if self.vector_store:
+            self.vector_store.delete_collection()
+            self.persist()
+            logging.info("Cleared all data from faiss vector_store.")
+
+    def rebuild(self, documents: List[Any], embeddings: Any) -> bool:
+        """
+        Rebuild the vector store from the provided documents and embeddings.
+        """
+        self.clear_all_data()
+        self.create_from_documents(documents, embeddings)
+        self.persist()
+        logging.info("Successfully rebuilt vector_store")
+        return True